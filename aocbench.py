@@ -0,0 +1,201 @@
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from aocrunner import parse_day_list
+
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(__file__), "bench_output.txt")
+
+
+def consume(result) -> Any:
+    """
+    Runs a common() or part generator to the end without printing anything, and returns the last thing it yielded.
+    """
+    last = None
+    if result:
+        for last in result:
+            pass
+    return last
+
+
+def percentile(samples: List[int], fraction: float) -> int:
+    # Nearest-rank percentile
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[int]) -> Dict[str, Any]:
+    return {
+        'min_ns': min(samples),
+        'median_ns': int(statistics.median(samples)),
+        'p95_ns': percentile(samples, 0.95),
+        'samples_ns': samples,
+    }
+
+
+def measure_day(instance, parts: List[int], warmup: int, repeat: int) -> Dict[str, Any]:
+    """
+    Times every phase of a day, warmup + repeat times, with perf_counter_ns. Every part is timed on fresh state that
+    is built by an untimed load_input() and common(). Everything the day prints is discarded.
+    Returns the samples of the timed repetitions per phase, and the final answer of every part.
+    """
+    samples = {phase: [] for phase in ["load_input", "common"] + ["part{}".format(p) for p in parts]}
+    answers = {}
+    instance.download_input()
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for repetition in range(warmup + repeat):
+            timings = {}
+            start = time.perf_counter_ns()
+            instance.load_input()
+            timings['load_input'] = time.perf_counter_ns() - start
+
+            start = time.perf_counter_ns()
+            consume(instance.common(instance.input_data))
+            timings['common'] = time.perf_counter_ns() - start
+
+            for i, part in enumerate(parts):
+                if i > 0:
+                    instance.load_input()
+                    consume(instance.common(instance.input_data))
+                phase = "part{}".format(part)
+                start = time.perf_counter_ns()
+                answer = consume(getattr(instance, phase)(instance.input_data))
+                timings[phase] = time.perf_counter_ns() - start
+                answers[phase] = None if answer is None else str(answer)
+
+            if repetition >= warmup:
+                for phase, duration in timings.items():
+                    samples[phase].append(duration)
+    instance.close_input()
+
+    return {'samples': samples, 'answers': answers}
+
+
+def baseline_phases(baseline: Dict, day_number: str, key: str, creator: str) -> Dict:
+    # Results are kept per implementation. Baselines from before that have them per creator, which is what they are
+    # compared against then.
+    implementations = baseline.get(day_number, {})
+    return implementations.get(key, implementations.get(creator, {}))
+
+
+def compare(results: Dict, baseline: Dict, creators: Dict[str, str], threshold: float) -> List[str]:
+    """
+    Returns a message for every phase whose median got slower than the baseline median by more than threshold
+    (a fraction, so 0.1 is 10%).
+    """
+    slowdowns = []
+    for day_number, implementations in results.items():
+        for key, phases in implementations.items():
+            old_phases = baseline_phases(baseline, day_number, key, creators[key])
+            for phase, stats in phases.items():
+                if phase not in old_phases:
+                    continue
+                old = old_phases[phase]['median_ns']
+                new = stats['median_ns']
+                if old > 0 and new > old * (1 + threshold):
+                    slowdowns.append("Day {} ({} ({})) {} got slower: {:.3f} ms -> {:.3f} ms (+{:.1f}%)".format(
+                        day_number, creators[key], key, phase, old / 1e6, new / 1e6, (new / old - 1) * 100
+                    ))
+    return slowdowns
+
+
+def print_table(results: Dict, baseline: Optional[Dict], creators: Dict[str, str]):
+    header = "{:>3}  {:<10} {:<10} {:>12} {:>12} {:>12}".format("Day", "Creator", "Phase", "min ms", "median ms",
+                                                               "p95 ms")
+    if baseline is not None:
+        header += " {:>12} {:>8}".format("baseline ms", "change")
+    print(header + "  Implementation")
+
+    for day_number, implementations in results.items():
+        for key, phases in implementations.items():
+            old_phases = baseline_phases(baseline, day_number, key, creators[key]) if baseline is not None else {}
+            for phase, stats in phases.items():
+                line = "{:>3}  {:<10} {:<10} {:>12.3f} {:>12.3f} {:>12.3f}".format(
+                    day_number, creators[key], phase, stats['min_ns'] / 1e6, stats['median_ns'] / 1e6,
+                    stats['p95_ns'] / 1e6
+                )
+                if baseline is not None:
+                    if phase in old_phases:
+                        old = old_phases[phase]['median_ns']
+                        line += " {:>12.3f} {:>+7.1f}%".format(old / 1e6, (stats['median_ns'] / old - 1) * 100
+                                                               if old else 0.0)
+                    else:
+                        line += " {:>12} {:>8}".format("-", "-")
+                print(line + "  " + key)
+
+
+def main(args: List[str], settings: Dict) -> int:
+    parser = argparse.ArgumentParser(prog="run.py bench", description="Benchmarks the solutions of the given days")
+    parser.add_argument("days", nargs="*", help="days to benchmark, or 'all' (the default)")
+    parser.add_argument("-p", "--parts", type=int, nargs="+", choices=[1, 2], default=[1, 2],
+                        help="parts to benchmark")
+    parser.add_argument("-w", "--warmup", type=int, default=1, help="untimed repetitions before measuring")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="timed repetitions")
+    parser.add_argument("-o", "--output", default=DEFAULT_OUTPUT, help="file to write the JSON results to")
+    parser.add_argument("-b", "--baseline", help="earlier JSON results to compare against")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1,
+                        help="fraction a median may get slower than the baseline before it is flagged")
+    args = parser.parse_args(args)
+
+    try:
+        days_to_run = parse_day_list(args.days)
+    except ValueError as e:
+        print(e)
+        return 2
+
+    if args.repeat < 1 or args.warmup < 0:
+        print("Need at least one repetition, and no negative warmup.")
+        return 2
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)['results']
+
+    from aocdays import AOCDays
+    days = AOCDays.get_instance()
+
+    # Implementations are told apart by their class, as several of them can have the same creator
+    results = {}
+    creators = {}
+    for d in days_to_run:
+        for someones_day in days.get_day(d):
+            key = someones_day.identity()
+            creators[key] = someones_day.creator
+            print("Benchmarking AoC day {} from {} ({})...".format(d, someones_day.creator, key))
+            instance = someones_day(settings['year'], d, settings['session_token'])
+            measured = measure_day(instance, args.parts, args.warmup, args.repeat)
+            results.setdefault(str(d), {})[key] = {
+                phase: summarize(samples) for phase, samples in measured['samples'].items()
+            }
+
+    print("")
+    print_table(results, baseline, creators)
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'created': datetime.datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'warmup': args.warmup,
+            'repeat': args.repeat,
+            'results': results,
+            'creators': creators,
+        }, f, indent=2)
+    print("")
+    print("Results written to {}".format(args.output))
+
+    if baseline is not None:
+        slowdowns = compare(results, baseline, creators, args.threshold)
+        for message in slowdowns:
+            print(message)
+        if slowdowns:
+            return 1
+    return 0
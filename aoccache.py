@@ -0,0 +1,74 @@
+import hashlib
+import os
+import pickle
+import sys
+import types
+from typing import Any, Optional
+
+CACHE_DIRECTORY = os.path.join(os.path.dirname(__file__), "cache")
+
+
+def file_hash(filename: str) -> str:
+    with open(filename, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def source_hash(cls: type) -> str:
+    """
+    Hashes the source of the module a day is defined in, together with the source of any helper modules from the
+    days package that it uses, so that editing any of them invalidates what was cached for that day.
+    """
+    module = sys.modules[cls.__module__]
+    filenames = {module.__file__}
+    for value in vars(module).values():
+        if isinstance(value, types.ModuleType):
+            other = value
+        else:
+            other = sys.modules.get(getattr(value, "__module__", None) or "")
+        if other is not None and other.__name__.startswith("days.") and getattr(other, "__file__", None):
+            filenames.add(other.__file__)
+
+    h = hashlib.sha256()
+    for filename in sorted(filenames):
+        with open(filename, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def cache_filename(kind: str, day_number: int, implementation: str) -> str:
+    return os.path.join(CACHE_DIRECTORY, "{}_day{}_{}.pickle".format(kind, day_number, implementation))
+
+
+def load(filename: str, key: Any) -> Optional[Any]:
+    """
+    Loads a cache entry in one read. Returns None if there is no entry, if it was stored under a different key, or if
+    it cannot be read anymore.
+    """
+    if not os.path.isfile(filename):
+        return None
+
+    # noinspection PyBroadException
+    try:
+        with open(filename, 'rb') as f:
+            stored_key, value = pickle.loads(f.read())
+    except Exception:
+        return None
+    return value if stored_key == key else None
+
+
+def store(filename: str, key: Any, value: Any) -> bool:
+    """
+    Stores a cache entry. The entry is written to a temporary file first and then moved into place, so concurrent
+    runs never read a half written entry. Returns False if the value cannot be pickled.
+    """
+    try:
+        data = pickle.dumps((key, value), protocol=pickle.HIGHEST_PROTOCOL)
+    except (pickle.PicklingError, TypeError, AttributeError, RecursionError):
+        return False
+
+    os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+    temporary_filename = "{}.{}.tmp".format(filename, os.getpid())
+    with open(temporary_filename, 'wb') as f:
+        f.write(data)
+    os.replace(temporary_filename, filename)
+    return True
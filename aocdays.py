@@ -1,17 +1,39 @@
+import importlib
+import os
+import re
 from typing import List
 
+DAYS_DIRECTORY = os.path.join(os.path.dirname(__file__), "days")
+
 
 class AOCDays:
     _instance = None
     days = None
+    discovered = None
 
     def __init__(self):
         self.days = {i: [] for i in range(26)}
+        self.discovered = set()
 
     def add_day(self, number: int, cls: 'days.AOCDay') -> None:
         self.days[number].append(cls)
 
+    def discover(self, number: int) -> None:
+        """
+        Imports the modules of the given day (days/dayN.py, and days/dayN_<anything>.py for alternative versions),
+        so their @day decorators register them. Modules of other days are left alone.
+        """
+        if number in self.discovered:
+            return
+        self.discovered.add(number)
+
+        pattern = re.compile(r"^day{}(_[^.]*)?\.py$".format(number))
+        for filename in sorted(os.listdir(DAYS_DIRECTORY)):
+            if pattern.match(filename):
+                importlib.import_module("days.{}".format(filename[:-3]))
+
     def get_day(self, number: int) -> 'List[days.AOCDay]':
+        self.discover(number)
         return self.days[number]
 
     @classmethod
@@ -19,4 +41,3 @@ class AOCDays:
         if not cls._instance:
             cls._instance = AOCDays()
         return cls._instance
-
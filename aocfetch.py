@@ -0,0 +1,128 @@
+import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from aocrunner import parse_day_list
+
+AOC_URL = "https://adventofcode.com"
+INPUT_DIRECTORY = os.path.join(os.path.dirname(__file__), "inputs")
+DEFAULT_TIMEOUT = 30
+DEFAULT_RETRIES = 3
+
+
+def input_filename(day_number: int) -> str:
+    return os.path.join(INPUT_DIRECTORY, "day{}_{}".format(day_number, "input"))
+
+
+def create_session(session_token: str, pool_size: int = 1, retries: int = DEFAULT_RETRIES):
+    """
+    Creates a requests session that keeps up to pool_size connections open for reuse, and retries failed requests
+    (connection errors and 429/5xx responses) with exponential backoff.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504],
+                  allowed_methods=["GET"], raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.cookies.set("session", session_token)
+    return session
+
+
+def write_atomic(filename: str, text: str) -> None:
+    # Write next to the target and move it into place, so a crash never leaves a truncated file behind
+    temporary_filename = "{}.{}.tmp".format(filename, os.getpid())
+    try:
+        with open(temporary_filename, 'w') as f:
+            f.write(text)
+        os.replace(temporary_filename, filename)
+    finally:
+        if os.path.exists(temporary_filename):
+            os.remove(temporary_filename)
+
+
+def fetch_input(session, year: int, day_number: int, filename: str, base_url: str = AOC_URL,
+                timeout: float = DEFAULT_TIMEOUT) -> str:
+    """
+    Downloads the input of a day and writes it to filename. Raises ConnectionError if it could not be downloaded.
+    """
+    import requests
+
+    input_url = "{}/{}/day/{}/input".format(base_url.rstrip("/"), year, day_number)
+    try:
+        result = session.get(input_url, timeout=timeout)
+    except requests.RequestException as e:
+        raise ConnectionError("Could not connect to AoC website to download input data. {}".format(e))
+
+    if result.status_code != 200:
+        raise ConnectionError("Could not connect to AoC website to download input data. "
+                              "Error code {}: {}".format(result.status_code, result.text))
+
+    write_atomic(filename, result.text)
+    return result.text
+
+
+def prefetch(days_to_fetch: List[int], year: int, session_token: str, jobs: int, base_url: str = AOC_URL,
+             timeout: float = DEFAULT_TIMEOUT, retries: int = DEFAULT_RETRIES,
+             force: bool = False) -> Dict[int, Optional[str]]:
+    """
+    Downloads the inputs of the given days that are not on disk yet (or all of them if force is set), at most jobs
+    at the same time, over one pooled session. Returns the days that were fetched, mapped to None on success or to
+    the error message on failure.
+    """
+    missing = [d for d in days_to_fetch if force or not os.path.isfile(input_filename(d))]
+    if not missing:
+        return {}
+
+    session = create_session(session_token, pool_size=jobs, retries=retries)
+
+    def fetch(day_number):
+        try:
+            fetch_input(session, year, day_number, input_filename(day_number), base_url, timeout)
+            return day_number, None
+        except (ConnectionError, OSError) as e:
+            return day_number, str(e)
+
+    with session, ThreadPoolExecutor(max_workers=jobs) as executor:
+        return dict(executor.map(fetch, missing))
+
+
+def main(args: List[str], settings: Dict) -> int:
+    parser = argparse.ArgumentParser(prog="run.py prefetch",
+                                     description="Downloads the inputs of the given days that are not on disk yet")
+    parser.add_argument("days", nargs="*", help="days to download, or 'all' (the default)")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="number of downloads at the same time")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="timeout per request in seconds")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="number of retries per request")
+    parser.add_argument("--base-url", default=AOC_URL, help="server to download from")
+    parser.add_argument("-f", "--force", action="store_true", help="also download inputs that are already on disk")
+    args = parser.parse_args(args)
+
+    try:
+        days_to_fetch = parse_day_list(args.days)
+    except ValueError as e:
+        print(e)
+        return 2
+
+    if args.jobs < 1:
+        print("Number of jobs must be at least 1.")
+        return 2
+
+    results = prefetch(days_to_fetch, settings['year'], settings['session_token'], args.jobs, args.base_url,
+                       args.timeout, args.retries, args.force)
+    if not results:
+        print("All inputs are already downloaded.")
+        return 0
+
+    for day_number, error in sorted(results.items()):
+        if error is None:
+            print("Downloaded input for day {}".format(day_number))
+        else:
+            print("Could not download input for day {}: {}".format(day_number, error))
+    return 1 if any(error is not None for error in results.values()) else 0
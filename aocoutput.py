@@ -0,0 +1,110 @@
+import sys
+from typing import Any, List, Optional, TextIO
+
+VERBOSITY_NORMAL = "normal"
+VERBOSITY_QUIET = "quiet"
+VERBOSITY_FILE = "file"
+VERBOSITIES = [VERBOSITY_NORMAL, VERBOSITY_QUIET, VERBOSITY_FILE]
+
+_NOTHING = object()
+
+
+class Lazy:
+    """
+    Something for a day to yield that is only formatted once it is actually written, so output that is dropped (like
+    progress information in quiet mode) costs nothing to format. Takes either a format string and its arguments, or a
+    function (and its arguments) that returns the text.
+    In quiet mode the final item of a section is only formatted at the end of that section, so only use this for
+    things that do not change after being yielded, or for progress information.
+    """
+    def __init__(self, text_or_function, *args, **kwargs):
+        self.text_or_function = text_or_function
+        self.args = args
+        self.kwargs = kwargs
+
+    def __str__(self):
+        if callable(self.text_or_function):
+            return str(self.text_or_function(*self.args, **self.kwargs))
+        return self.text_or_function.format(*self.args, **self.kwargs)
+
+
+class OutputSink:
+    """
+    Receives everything a day yields and writes it to the output file and the console, depending on the verbosity:
+    - normal: everything goes to both the output file and the console
+    - quiet: only the last thing yielded in every section (the final answer) is kept, everything yielded before it is
+      dropped without being formatted
+    - file: everything goes to the output file only
+    Structural lines (section headers, timings) are written with detail(), which quiet mode leaves out too. Writes are
+    buffered and flushed at the end of every section, or when the buffer grows larger than buffer_size characters.
+    """
+    verbosity: str
+    output_file: TextIO
+    console: Optional[TextIO]
+    buffer: List[str]
+    buffered: int = 0
+    buffer_size: int = 1 << 16
+    pending: Any = _NOTHING
+    items: int = 0
+
+    def __init__(self, output_file: TextIO, verbosity: str = VERBOSITY_NORMAL, console: Optional[TextIO] = None,
+                 buffer_size: int = 1 << 16):
+        if verbosity not in VERBOSITIES:
+            raise ValueError("Unknown verbosity {}".format(verbosity))
+        self.verbosity = verbosity
+        self.output_file = output_file
+        self.console = None if verbosity == VERBOSITY_FILE else (console or sys.stdout)
+        self.buffer = []
+        self.buffered = 0
+        self.buffer_size = buffer_size
+        self.pending = _NOTHING
+        self.items = 0
+
+    def line(self, thing: Any) -> None:
+        text = "{}\n".format(thing)
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def detail(self, thing: Any) -> None:
+        # A structural line, that only belongs in the full output
+        if self.verbosity != VERBOSITY_QUIET:
+            self.line(thing)
+
+    def item(self, thing: Any) -> None:
+        """
+        Writes something a day yielded. In quiet mode it is only remembered until the end of the section, when the
+        last one is written.
+        """
+        self.items += 1
+        if self.verbosity == VERBOSITY_QUIET:
+            self.pending = thing
+        else:
+            self.line(thing)
+
+    def end_section(self) -> int:
+        """
+        Ends a section, writing the final answer in quiet mode. Returns the amount of things yielded in the section.
+        """
+        if self.pending is not _NOTHING:
+            self.line(self.pending)
+            self.pending = _NOTHING
+        items, self.items = self.items, 0
+        self.flush()
+        return items
+
+    def flush(self) -> None:
+        if not self.buffer:
+            return
+        text = "".join(self.buffer)
+        self.buffer = []
+        self.buffered = 0
+        self.output_file.write(text)
+        if self.console is not None:
+            self.console.write(text)
+            self.console.flush()
+
+    def close(self) -> None:
+        self.end_section()
+        self.output_file.flush()
@@ -0,0 +1,90 @@
+import argparse
+import contextlib
+import cProfile
+import os
+import pstats
+from typing import Dict, List
+
+from aocbench import consume
+
+DEFAULT_OUTPUT_DIRECTORY = os.path.join(os.path.dirname(__file__), "profiles")
+
+
+def profile_phase(profiler: cProfile.Profile, function, input_data):
+    # Consume the generator inside the profiler, otherwise only the creation of the generator is profiled
+    profiler.enable()
+    try:
+        consume(function(input_data))
+    finally:
+        profiler.disable()
+
+
+def profile_day(instance, output_directory: str, top: int) -> None:
+    """
+    Profiles common(), part1() and part2() of a day separately. Writes a .pstats file per phase, and prints the top
+    functions of every phase by cumulative and by own time.
+    """
+    instance.download_input()
+    instance.load_input()
+    os.makedirs(output_directory, exist_ok=True)
+
+    profilers = {}
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        profilers['common'] = cProfile.Profile()
+        profile_phase(profilers['common'], instance.common, instance.input_data)
+        snapshot = instance.snapshot()
+
+        for part in [1, 2]:
+            phase = "part{}".format(part)
+            if part == 2:
+                if snapshot is not None:
+                    instance.restore(snapshot)
+                else:
+                    instance.load_input()
+                    consume(instance.common(instance.input_data))
+            profilers[phase] = cProfile.Profile()
+            profile_phase(profilers[phase], getattr(instance, phase), instance.input_data)
+
+    filenames = {}
+    for phase, profiler in profilers.items():
+        # Named after the class, as several implementations can have the same creator
+        filenames[phase] = os.path.join(output_directory, "day{}_{}_{}.pstats".format(
+            instance.day_number, instance.identity().replace("days.", "", 1), phase))
+        profiler.dump_stats(filenames[phase])
+
+    for phase, profiler in profilers.items():
+        stats = pstats.Stats(profiler)
+        if not stats.total_calls:
+            print("== {}: nothing to profile ==".format(phase))
+            print("")
+            continue
+
+        print("== {} ({:.3f} s, written to {}) ==".format(phase, stats.total_tt, filenames[phase]))
+        for sort_key, title in [(pstats.SortKey.CUMULATIVE, "cumulative time"), (pstats.SortKey.TIME, "own time")]:
+            print("-- Top {} by {} --".format(top, title))
+            stats.strip_dirs().sort_stats(sort_key).print_stats(top)
+
+
+def main(args: List[str], settings: Dict) -> int:
+    parser = argparse.ArgumentParser(prog="run.py profile",
+                                     description="Profiles common, part 1 and part 2 of a day with cProfile")
+    parser.add_argument("day", type=int, help="day to profile")
+    parser.add_argument("-n", "--top", type=int, default=20, help="number of functions to show per phase")
+    parser.add_argument("-o", "--output-dir", default=DEFAULT_OUTPUT_DIRECTORY,
+                        help="directory to write the .pstats files to")
+    args = parser.parse_args(args)
+
+    if args.day <= 0 or args.day > 25:
+        print("Day given is out of range 1-25.")
+        return 2
+
+    from aocdays import AOCDays
+    implementations = AOCDays.get_instance().get_day(args.day)
+    if not implementations:
+        print("I have nothing to profile for day {}".format(args.day))
+        return 1
+
+    for someones_day in implementations:
+        print("Profiling AoC day {} from {} ({})...".format(args.day, someones_day.creator, someones_day.identity()))
+        profile_day(someones_day(settings['year'], args.day, settings['session_token']), args.output_dir, args.top)
+    return 0
@@ -0,0 +1,144 @@
+import contextlib
+import datetime
+import io
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aocoutput
+
+
+def parse_day_list(values: List[str]) -> List[int]:
+    """
+    Turns a list of day numbers (or 'all') from the command line into a list of days. No values means all days.
+    """
+    if not values or "all" in values:
+        return [x+1 for x in range(25)]
+
+    days_to_run = []
+    for value in values:
+        day_number = int(value)
+        if day_number <= 0 or day_number > 25:
+            raise ValueError("Day {} is out of range 1-25.".format(day_number))
+        days_to_run.append(day_number)
+    return days_to_run
+
+
+def run_in_process(target: Callable, args: Tuple, budget: Optional[float] = None,
+                   on_message: Optional[Callable[[str, Any], bool]] = None) -> Tuple[str, Any]:
+    """
+    Runs target(*args, connection) in a separate process, which sends (kind, value) pairs back through the connection.
+    Every pair is passed to on_message as it comes in, until on_message returns True for one. Without on_message, the
+    first pair is the result. The process is killed once it takes longer than budget seconds (None for no limit).
+    Returns the pair that ended the run, ("timeout", None) if the budget ran out first, or ("error", message) if the
+    process stopped before it sent that pair.
+    """
+    # Fork where possible, so the target and its arguments (like a day with the state common() built) do not need to be
+    # pickled
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    else:
+        context = multiprocessing.get_context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=target, args=tuple(args) + (sender,), daemon=True)
+    process.start()
+    sender.close()
+    deadline = None if budget is None else time.perf_counter() + budget
+
+    result = "timeout", None
+    try:
+        while True:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+            if (remaining is not None and remaining <= 0) or not receiver.poll(remaining):
+                break
+            try:
+                message = receiver.recv()
+            except EOFError:
+                result = "error", "The worker stopped without a result."
+                break
+            if on_message is None or on_message(*message):
+                result = message
+                break
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+        receiver.close()
+    return result
+
+
+def run_day(day_number: int, year: int, session_token: str, create: bool = False,
+            options: Optional[Dict] = None) -> None:
+    """
+    Runs every registered implementation of the given day, or creates the files for it if it is today (or if
+    create is set) and nothing is registered for it yet. The options are passed on to the constructor of the days.
+    """
+    # Dynamically try to load the requested day
+    from aocdays import AOCDays
+    days: AOCDays = AOCDays.get_instance()
+
+    day = days.get_day(day_number)
+
+    if day:
+        for someones_day in day:
+            if (options or {}).get('verbosity', aocoutput.VERBOSITY_NORMAL) == aocoutput.VERBOSITY_NORMAL:
+                print("Attempting to run AoC day {} from {}...".format(day_number, someones_day.creator))
+            # noinspection PyBroadException
+            try:
+                instance = someones_day(year, day_number, session_token, **(options or {}))
+                instance.run()
+            except ConnectionError as e:
+                print(e, file=sys.stderr)
+            except Exception as e:
+                traceback.print_exc()
+    else:
+        if day_number == datetime.date.today().day or create:
+            # This is today, create it!
+            template_filename = os.path.join(os.path.dirname(__file__), "days/_template.py")
+            newday_filename = os.path.join(os.path.dirname(__file__), "days/day{}.py".format(day_number))
+            shutil.copy(template_filename, newday_filename)
+            with open(newday_filename, 'r') as f:
+                lines = f.readlines()
+            lines = [x.replace("@day(0)", "@day({})".format(day_number)) for x in lines]
+            with open(newday_filename, 'w') as f:
+                f.writelines(lines)
+
+            print("Files for day {} created! Happy coding and good luck!".format(day_number))
+        else:
+            print("Attempting to run AoC day {}...".format(day_number))
+            print("I have nothing to run for day {}".format(day_number))
+
+
+def run_day_captured(day_number: int, year: int, session_token: str,
+                     options: Optional[Dict] = None) -> Tuple[int, str]:
+    """
+    Worker entry point for parallel runs. Runs the day like run_day, but collects everything it would have printed
+    so the parent process can print the console blocks in day order.
+    """
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer), contextlib.redirect_stderr(buffer):
+        # noinspection PyBroadException
+        try:
+            run_day(day_number, year, session_token, options=options)
+        except Exception:
+            traceback.print_exc()
+    return day_number, buffer.getvalue()
+
+
+def run_days_parallel(days_to_run: List[int], year: int, session_token: str, jobs: int,
+                      options: Optional[Dict] = None) -> None:
+    """
+    Runs the given days in a pool of worker processes, one day per worker. Every day still writes its own output
+    file, and the console output of the days is printed in day order as soon as all earlier days have finished.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(run_day_captured, d, year, session_token, options) for d in days_to_run]
+        for future in futures:
+            _, output = future.result()
+            print(output, end="")
+            sys.stdout.flush()
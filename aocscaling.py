@@ -0,0 +1,153 @@
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import traceback
+from typing import Dict, List, Optional
+
+from aocrunner import parse_day_list, run_in_process
+
+DEFAULT_BUDGET = 60
+# Phases faster than this (at the largest size) are too noisy to fail on
+MIN_FLAGGED_NS = 1000000
+
+
+def fit_exponent(sizes: List[int], durations: List[int]) -> Optional[float]:
+    """
+    Fits duration = c * size^k with least squares on a log-log scale, and returns k (1 is linear, 2 quadratic). Returns
+    None if there are not enough usable measurements.
+    """
+    points = [(math.log(s), math.log(d)) for s, d in zip(sizes, durations) if s > 0 and d > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def measure_worker(cls, year: int, day_number: int, session_token: str, filename: str, parts: List[int],
+                   repeat: int, connection) -> None:
+    # noinspection PyBroadException
+    try:
+        from aocbench import measure_day
+
+        instance = cls(year, day_number, session_token)
+        instance.input_filename = filename
+        measured = measure_day(instance, parts, 0, repeat)
+        connection.send(("done", {phase: min(samples) for phase, samples in measured['samples'].items()}))
+    except Exception:
+        connection.send(("error", traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+def measure_size(cls, year: int, day_number: int, session_token: str, filename: str, parts: List[int], repeat: int,
+                 budget: float) -> Optional[Dict[str, int]]:
+    """
+    Measures a day on the input in filename in a separate process (which also keeps state that days keep on their
+    class from leaking between sizes), and kills it if it takes longer than budget seconds. Returns the fastest time
+    of every phase in nanoseconds, or None if it failed or ran out of time.
+    """
+    status, value = run_in_process(measure_worker, (cls, year, day_number, session_token, filename, parts, repeat),
+                                   budget)
+    if status == "error":
+        print(value, file=sys.stderr)
+    return value if status == "done" else None
+
+
+def sweep(cls, year: int, day_number: int, session_token: str, sizes: List[int], parts: List[int], repeat: int,
+          budget: float, seed: int) -> Dict[int, Optional[Dict[str, int]]]:
+    """
+    Runs a day on a generated input of every size, smallest first. Stops at the first size that failed or ran out of
+    time, as the larger ones will not do any better.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sorted(sizes):
+            filename = os.path.join(directory, "day{}_{}".format(day_number, size))
+            with open(filename, 'w') as f:
+                f.write("\n".join(cls.generate_input(size, random.Random(seed))))
+                f.write("\n")
+            results[size] = measure_size(cls, year, day_number, session_token, filename, parts, repeat, budget)
+            if results[size] is None:
+                break
+    return results
+
+
+def main(args: List[str], settings: Dict) -> int:
+    parser = argparse.ArgumentParser(prog="run.py scaling",
+                                     description="Runs the given days on generated inputs of growing sizes, and "
+                                                 "estimates how their running time grows with the size")
+    parser.add_argument("days", nargs="*", help="days to sweep, or 'all' (the default)")
+    parser.add_argument("-s", "--sizes", type=int, nargs="+",
+                        help="input sizes to sweep (default: the sizes the day chose)")
+    parser.add_argument("-p", "--parts", type=int, nargs="+", choices=[1, 2], default=[1, 2],
+                        help="parts to measure")
+    parser.add_argument("-n", "--repeat", type=int, default=1, help="repetitions per size, the fastest one counts")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                        help="seconds a single size may take before the sweep of that day stops")
+    parser.add_argument("--seed", type=int, default=2018, help="seed for the input generators")
+    parser.add_argument("--max-exponent", type=float,
+                        help="fail if a phase grows faster than size to this power")
+    args = parser.parse_args(args)
+
+    try:
+        days_to_run = parse_day_list(args.days)
+    except ValueError as e:
+        print(e)
+        return 2
+
+    if args.repeat < 1:
+        print("Need at least one repetition.")
+        return 2
+
+    from aocdays import AOCDays
+    days = AOCDays.get_instance()
+
+    too_steep = []
+    print("{:>3}  {:<10} {:<10} {:>8}  {}".format("Day", "Creator", "Phase", "Exponent", "ms per size"))
+    for d in days_to_run:
+        for someones_day in days.get_day(d):
+            sizes = args.sizes or someones_day.scaling_sizes
+            if not sizes:
+                print("{:>3}  {:<10} {:<10} {:>8}  {}".format(d, someones_day.creator, "-", "-",
+                                                           "no input sizes to sweep"))
+                continue
+            try:
+                results = sweep(someones_day, settings['year'], d, settings['session_token'], sizes, args.parts,
+                                args.repeat, args.budget, args.seed)
+            except NotImplementedError as e:
+                print("{:>3}  {:<10} {:<10} {:>8}  {}".format(d, someones_day.creator, "-", "-", e))
+                continue
+
+            measured = {size: phases for size, phases in results.items() if phases is not None}
+            stopped = [size for size, phases in results.items() if phases is None]
+            phases = next(iter(measured.values())).keys() if measured else []
+            for phase in phases:
+                exponent = fit_exponent(list(measured.keys()), [p[phase] for p in measured.values()])
+                steep = (exponent is not None and args.max_exponent is not None and exponent > args.max_exponent
+                         and max(p[phase] for p in measured.values()) >= MIN_FLAGGED_NS)
+                if steep:
+                    too_steep.append("Day {} ({}) {} grows with size^{:.2f}".format(d, someones_day.creator, phase,
+                                                                                   exponent))
+                print("{:>3}  {:<10} {:<10} {:>8}  {}{}".format(
+                    d, someones_day.creator, phase, "-" if exponent is None else "{:.2f}".format(exponent),
+                    ", ".join("{}: {:.3f}".format(size, p[phase] / 1e6) for size, p in measured.items()),
+                    " (too steep)" if steep else ""
+                ))
+            if stopped:
+                print("{:>3}  {:<10} {:<10} {:>8}  stopped at size {}: failed or took longer than {} s".format(
+                    d, someones_day.creator, "-", "-", stopped[0], args.budget
+                ))
+
+    if too_steep:
+        print("")
+        for message in too_steep:
+            print(message)
+        return 1
+    return 0
@@ -0,0 +1,148 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import tracemalloc
+import traceback
+from typing import Dict, List, Optional
+
+from aocrunner import run_in_process
+
+
+def shootout_worker(cls, year: int, day_number: int, session_token: str, filename: Optional[str], parts: List[int],
+                    warmup: int, repeat: int, connection) -> None:
+    """
+    Measures one implementation: first its time over warmup + repeat runs, then its peak memory use in one more run
+    with tracemalloc (which slows everything down, so it is not timed).
+    """
+    # noinspection PyBroadException
+    try:
+        from aocbench import measure_day
+
+        instance = cls(year, day_number, session_token)
+        if filename is not None:
+            instance.input_filename = filename
+        measured = measure_day(instance, parts, warmup, repeat)
+
+        tracemalloc.start()
+        try:
+            measure_day(instance, parts, 0, 1)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        connection.send(("done", {'samples': measured['samples'], 'answers': measured['answers'], 'peak': peak}))
+    except Exception:
+        connection.send(("error", traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+def run_implementation(cls, year: int, day_number: int, session_token: str, filename: Optional[str],
+                       parts: List[int], warmup: int, repeat: int, budget: Optional[float]) -> Dict:
+    """
+    Runs shootout_worker in a separate process, so state that an implementation keeps on its class (or garbage it
+    leaves behind) cannot influence the next one. Returns the status ("done", "error" or "timeout") and the result.
+    """
+    status, value = run_in_process(shootout_worker, (cls, year, day_number, session_token, filename, parts, warmup,
+                                                     repeat), budget)
+    return {'status': status, 'value': value}
+
+
+def main(args: List[str], settings: Dict) -> int:
+    parser = argparse.ArgumentParser(prog="run.py shootout",
+                                     description="Runs every implementation of a day on the same input, checks that "
+                                                 "their answers agree, and ranks them by speed and memory use")
+    parser.add_argument("day", type=int, help="day to compare the implementations of")
+    parser.add_argument("-p", "--parts", type=int, nargs="+", choices=[1, 2], default=[1, 2],
+                        help="parts to compare")
+    parser.add_argument("-w", "--warmup", type=int, default=1, help="untimed repetitions before measuring")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="timed repetitions")
+    parser.add_argument("--size", type=int, help="use a generated input of this size instead of the real input")
+    parser.add_argument("--seed", type=int, default=2018, help="seed for the generated input")
+    parser.add_argument("--budget", type=float, default=None, help="seconds an implementation may take in total")
+    args = parser.parse_args(args)
+
+    if args.day <= 0 or args.day > 25:
+        print("Day given is out of range 1-25.")
+        return 2
+
+    if args.repeat < 1 or args.warmup < 0:
+        print("Need at least one repetition, and no negative warmup.")
+        return 2
+
+    from aocdays import AOCDays
+    implementations = AOCDays.get_instance().get_day(args.day)
+    if not implementations:
+        print("I have nothing to compare for day {}".format(args.day))
+        return 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = None
+        if args.size is not None:
+            # Every implementation gets the same generated input
+            filename = os.path.join(directory, "day{}_{}".format(args.day, args.size))
+            with open(filename, 'w') as f:
+                f.write("\n".join(implementations[0].generate_input(args.size, random.Random(args.seed))))
+                f.write("\n")
+        else:
+            # Download the input once up front, instead of in every worker
+            implementations[0](settings['year'], args.day, settings['session_token']).download_input()
+
+        # Implementations are told apart by their class, as several of them can have the same creator
+        results = {}
+        creators = {}
+        labels = {}
+        for someones_day in implementations:
+            key = someones_day.identity()
+            creators[key] = someones_day.creator
+            labels[key] = "{} ({})".format(someones_day.creator, key)
+            print("Running AoC day {} from {}...".format(args.day, labels[key]))
+            results[key] = run_implementation(someones_day, settings['year'], args.day, settings['session_token'],
+                                              filename, args.parts, args.warmup, args.repeat, args.budget)
+
+    finished = {key: result['value'] for key, result in results.items() if result['status'] == "done"}
+    for key, result in results.items():
+        if result['status'] == "timeout":
+            print("{} ran out of its budget of {} s".format(labels[key], args.budget))
+        elif result['status'] == "error":
+            print("{} failed:".format(labels[key]))
+            print(result['value'])
+
+    # Rank on the median of the total time of all phases
+    totals = {key: statistics.median(sum(samples) for samples in zip(*value['samples'].values()))
+              for key, value in finished.items()}
+    ranking = sorted(finished.keys(), key=lambda key: totals[key])
+    # The answers are checked against the first implementation that was registered (the original one)
+    original = next((key for key in results if key in finished), None)
+    reference = finished[original]['answers'] if original else {}
+
+    print("")
+    phases = ["load_input", "common"] + ["part{}".format(p) for p in args.parts]
+    print("{:>4}  {:<10} {:>12} {:>8}  {}  {:>10}  {:<9}  {}".format(
+        "Rank", "Creator", "total ms", "x best", "  ".join("{:>10}".format(phase) for phase in phases), "peak MiB",
+        "Answers", "Implementation"
+    ))
+    disagreements = 0
+    for rank, key in enumerate(ranking, 1):
+        value = finished[key]
+        agrees = value['answers'] == reference
+        if not agrees:
+            disagreements += 1
+        print("{:>4}  {:<10} {:>12.3f} {:>8.2f}  {}  {:>10.2f}  {:<9}  {}".format(
+            rank, creators[key], totals[key] / 1e6, totals[key] / totals[ranking[0]] if totals[ranking[0]] else 1,
+            "  ".join("{:>10.3f}".format(statistics.median(value['samples'][phase]) / 1e6) for phase in phases),
+            value['peak'] / (1 << 20), "same" if agrees else "DIFFERENT", key
+        ))
+
+    for key in ranking:
+        if finished[key]['answers'] != reference:
+            print("")
+            print("{} does not agree with {}:".format(labels[key], labels[original]))
+            for phase in sorted(set(reference) | set(finished[key]['answers'])):
+                mine, theirs = finished[key]['answers'].get(phase), reference.get(phase)
+                if mine != theirs:
+                    print("  {}: {!r} instead of {!r}".format(phase, mine, theirs))
+
+    return 1 if disagreements or len(finished) < len(results) else 0
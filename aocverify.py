@@ -0,0 +1,189 @@
+import argparse
+import contextlib
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from aocrunner import parse_day_list, run_in_process
+
+DEFAULT_MANIFEST = os.path.join(os.path.dirname(__file__), "outputs", "answers.json")
+PARTS = ["part1", "part2"]
+# Seconds a single part may take, so a part that runs for hours does not keep the other answers from being checked
+DEFAULT_BUDGET = 300
+
+
+def verify_worker(cls, year: int, day_number: int, session_token: str, part: str, connection) -> None:
+    """
+    Runs an implementation of a day once, common() and the given part on fresh state, and sends the final answer of
+    the part and how long it took back through the connection.
+    """
+    # noinspection PyBroadException
+    try:
+        from aocbench import consume
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            instance = cls(year, day_number, session_token)
+            instance.download_input()
+            start = time.perf_counter()
+            instance.load_input()
+            consume(instance.common(instance.input_data))
+            answer = consume(getattr(instance, part)(instance.input_data))
+            elapsed = time.perf_counter() - start
+            instance.close_input()
+        connection.send(("done", (None if answer is None else str(answer), elapsed)))
+    except Exception:
+        connection.send(("error", traceback.format_exc()))
+    finally:
+        connection.close()
+
+
+def verify_day(day_number: int, year: int, session_token: str, budget: Optional[float]) -> Dict:
+    """
+    Runs every part of every implementation of a day, each in its own process (see verify_worker) that is killed if
+    the part takes longer than the budget, so the answers of the other parts still count. Returns the status of the
+    day ("done" or "error", with the error) and how long it took, and per implementation (numbered in the order they
+    were registered) its creator and identity, the answers of the parts that finished, the parts that ran out of their
+    budget and the total time of its parts.
+    """
+    from aocdays import AOCDays
+
+    outcome = {'status': "done", 'value': None, 'elapsed': 0.0, 'implementations': {}}
+    start = time.perf_counter()
+    for index, someones_day in enumerate(AOCDays.get_instance().get_day(day_number)):
+        implementation = {'creator': someones_day.creator, 'key': someones_day.identity(), 'answers': {},
+                          'timeouts': [], 'time': 0.0}
+        outcome['implementations'][index] = implementation
+        for part in PARTS:
+            status, value = run_in_process(verify_worker, (someones_day, year, day_number, session_token, part),
+                                           budget)
+            if status == "done":
+                implementation['answers'][part], elapsed = value
+                implementation['time'] += elapsed
+            elif status == "timeout":
+                implementation['timeouts'].append(part)
+                implementation['time'] += budget
+            else:
+                outcome['status'], outcome['value'] = "error", value
+                break
+        if outcome['status'] == "error":
+            break
+    outcome['elapsed'] = time.perf_counter() - start
+    return outcome
+
+
+def run_pool(days_to_run: List[int], year: int, session_token: str, jobs: int,
+             budget: Optional[float]) -> Dict[int, Dict]:
+    """
+    Verifies the days in at most jobs worker processes at the same time, one day per worker (see verify_day). Returns
+    the outcome of every day.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {day_number: executor.submit(verify_day, day_number, year, session_token, budget)
+                   for day_number in days_to_run}
+        return {day_number: future.result() for day_number, future in futures.items()}
+
+
+def expected_answers(expected: Dict, day_number: int, key: str, creator: str) -> Optional[Dict[str, str]]:
+    # The manifest has the answers per day and implementation (its identity()). Older manifests have them per
+    # creator, or only one set of answers per day for every implementation.
+    known = expected.get(str(day_number))
+    if known is None or any(part in known for part in PARTS):
+        return known
+    return known.get(key, known.get(creator))
+
+
+def main(args: List[str], settings: Dict) -> int:
+    parser = argparse.ArgumentParser(prog="run.py verify",
+                                     description="Checks the final answers of the given days against the answers "
+                                                 "that are known to be right")
+    parser.add_argument("days", nargs="*", help="days to verify, or 'all' (the default)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="number of days to run at the same time")
+    parser.add_argument("--budget", type=float, default=DEFAULT_BUDGET,
+                        help="time budget per part in seconds, 0 for none")
+    parser.add_argument("-m", "--manifest", default=DEFAULT_MANIFEST, help="file with the expected answers")
+    parser.add_argument("--record", action="store_true",
+                        help="store the answers of the days that finished as the expected answers")
+    args = parser.parse_args(args)
+
+    try:
+        days_to_run = parse_day_list(args.days)
+    except ValueError as e:
+        print(e)
+        return 2
+
+    if args.jobs < 1:
+        print("Number of jobs must be at least 1.")
+        return 2
+
+    expected = {}
+    if os.path.isfile(args.manifest):
+        with open(args.manifest, 'r') as f:
+            expected = json.load(f)
+
+    outcomes = run_pool(days_to_run, settings['year'], settings['session_token'], args.jobs, args.budget or None)
+
+    failures = 0
+    print("{:>3}  {:<10} {:<8} {:>12}  {:<24}  {}".format("Day", "Creator", "Result", "Time", "Implementation",
+                                                          "Details"))
+    for day_number in days_to_run:
+        outcome = outcomes[day_number]
+        if outcome['status'] != "done":
+            failures += 1
+            print("{:>3}  {:<10} {:<8} {:>10.3f} s  {:<24}  {}".format(day_number, "-", outcome['status'].upper(),
+                                                                       outcome['elapsed'], "-",
+                                                                       outcome['value'].strip()))
+            continue
+        if not outcome['implementations']:
+            print("{:>3}  {:<10} {:<8} {:>12}  {:<24}  {}".format(day_number, "-", "SKIP", "-", "-", "nothing to run"))
+            continue
+
+        # Implementations are told apart by their class, as several of them can have the same creator
+        recorded = {}
+        recorded_creators = set()
+        for _, result in sorted(outcome['implementations'].items()):
+            creator, key = result['creator'], result['key']
+            gave_up = ["{} gave up after the budget".format(part) for part in result['timeouts']]
+            if args.record:
+                # Parts that ran out of their budget keep the answer they had
+                recorded[key] = dict(expected_answers(expected, day_number, key, creator) or {})
+                recorded[key].update(result['answers'])
+                recorded_creators.add(creator)
+                status, details = "RECORDED", "; ".join(gave_up)
+            else:
+                known = expected_answers(expected, day_number, key, creator)
+                if known is None:
+                    status, details = "UNKNOWN", "; ".join(["no expected answers for this implementation"] + gave_up)
+                else:
+                    # Parts without a known answer (like ones that never finished) are not checked, but a part with a
+                    # known answer that ran out of its budget is not right either
+                    wrong = [part for part in PARTS if part in known and part in result['answers']
+                             and result['answers'][part] != known[part]]
+                    missing = [part for part in result['timeouts'] if part in known]
+                    status = "FAIL" if wrong else "TIMEOUT" if missing else "PASS"
+                    details = "; ".join(["{} gave {!r}, expected {!r}".format(
+                        part, result['answers'][part], known[part]
+                    ) for part in wrong] + gave_up)
+                    if wrong or missing:
+                        failures += 1
+            print("{:>3}  {:<10} {:<8} {:>10.3f} s  {:<24}  {}".format(day_number, creator, status, result['time'], key,
+                                                                       details))
+        if recorded:
+            day_answers = expected.get(str(day_number), {})
+            if any(part in day_answers for part in PARTS):
+                day_answers = {}
+            # Answers per creator from an older manifest are now kept per implementation
+            day_answers = {k: v for k, v in day_answers.items() if k not in recorded_creators}
+            expected[str(day_number)] = dict(day_answers, **recorded)
+
+    if args.record:
+        with open(args.manifest, 'w') as f:
+            json.dump(dict(sorted(expected.items(), key=lambda x: int(x[0]))), f, indent=2)
+            f.write("\n")
+        print("")
+        print("Expected answers written to {}".format(args.manifest))
+
+    return 1 if failures else 0
@@ -1,14 +1,18 @@
+import contextlib
+import copy
+import mmap
 import os
-import glob
+import random
+import sys
 import time
-from typing import Generator
-
-import requests
+import traceback
+from typing import Generator, Iterator, List
 
+import aoccache
+import aocoutput
+import aocrunner
 from aocdays import AOCDays
-
-modules = filter(lambda x: not x.startswith('_'), glob.glob(os.path.dirname(__file__) + "/*.py"))
-__all__ = [os.path.basename(f)[:-3] for f in modules]
+from aocoutput import Lazy
 
 
 def day(day_number):
@@ -27,19 +31,67 @@ class AOCDay:
     input_filename = ""
     output_filename = ""
     input_data = None
+    input_mmap = None
+    parse_cache = False
+    verbosity = aocoutput.VERBOSITY_NORMAL
+    budget = None
+    answer_cache = False
+    force = False
+
+    # How load_input() provides the input to the day:
+    # - "lines": a list of lines, or a single string if the input is only one line
+    # - "iter": a lazy iterator over the lines, which can only be consumed once (so only read it in common())
+    # - "mmap": a read-only memoryview of the memory-mapped input file
+    input_mode = "lines"
+
+    # How run() keeps the state common() built for part 2:
+    # - "copy": a deep copy by snapshot(), which is given up on (running common() again instead) once copying takes
+    #   longer than common() did
+    # - "share": the parts only read the state (or replace it with new objects), so the same objects are put back
+    # - "rerun": run common() again, for days whose state is cheaper to build than to copy
+    # Days without a common() never keep a snapshot.
+    snapshot_mode = "copy"
+
+    # Attributes that are not part of the state common() builds, and so are left out of snapshots: everything
+    # __init__() sets (restoring those from the parse cache would point a copied tree back at the files of the tree
+    # that built the cache), the input and what run() keeps about the run itself
+    snapshot_exclude = ("year", "day_number", "session_token", "input_filename", "output_filename",
+                        "input_data", "input_mmap", "parse_cache", "verbosity", "budget", "answer_cache", "force",
+                        "timings", "results")
+
+    # Input sizes that run.py scaling sweeps over by default, see generate_input()
+    scaling_sizes: List[int] = []
+
+    # Phases that run() times separately
+    timing_phases = ["load_input", "common", "common_output", "snapshot",
+                     "part1", "part1_output", "restore", "part2", "part2_output"]
+    timings = None
+    results = None
 
-    def __init__(self, year, day_number, session_token):
+    def __init__(self, year, day_number, session_token, parse_cache=False, verbosity=aocoutput.VERBOSITY_NORMAL,
+                 budget=None, answer_cache=False, force=False):
         self.year = year
         self.day_number = day_number
         self.session_token = session_token
+        self.parse_cache = parse_cache
+        self.verbosity = verbosity
+        self.budget = budget
+        self.answer_cache = answer_cache
+        self.force = force
         self.input_filename = os.path.join(os.path.dirname(__file__),
                                            "../inputs/day{}_{}".format(self.day_number, "input"))
-        if self.creator == "Kevin":
+        if type(self).__module__ == "days.day{}".format(self.day_number):
             self.output_filename = os.path.join(os.path.dirname(__file__),
                                                 "../outputs/day{}_{}".format(self.day_number, "output"))
         else:
-            self.output_filename = os.path.join(os.path.dirname(__file__),
-                                                "../outputs/day{}_{}_{}".format(self.day_number, "output", self.creator))
+            # Alternative implementations can have the same creator, so they are told apart by their class
+            self.output_filename = os.path.join(os.path.dirname(__file__), "../outputs/day{}_{}_{}".format(
+                self.day_number, "output", self.identity().replace("days.", "", 1)))
+
+    @classmethod
+    def identity(cls) -> str:
+        # Tells implementations of a day apart, also ones with the same creator
+        return "{}.{}".format(cls.__module__, cls.__qualname__)
 
     def download_input(self):
         if os.path.isfile(self.input_filename):
@@ -47,78 +99,367 @@ class AOCDay:
 
         print("Could not find input data for day {}, please wait while I download it...".format(self.day_number))
 
-        input_url = "https://adventofcode.com/{}/day/{}/input".format(self.year, self.day_number)
-        result = requests.get(input_url, cookies={'session': self.session_token})
-        if result.status_code == 200:
-            self.input_data = result.text
-            with open(self.input_filename, 'w') as f:
-                f.write(result.text)
-        else:
-            raise ConnectionError("Could not connect to AoC website to download input data. "
-                                  "Error code {}: {}".format(result.status_code, result.text))
+        # Only load the network stack when we actually need to download something
+        import aocfetch
+
+        with aocfetch.create_session(self.session_token) as session:
+            self.input_data = aocfetch.fetch_input(session, self.year, self.day_number, self.input_filename)
+
+    def iter_input(self) -> Iterator[str]:
+        with open(self.input_filename, 'r') as f:
+            for line in f:
+                yield line.replace("\n", "")
 
     def load_input(self):
-        if self.input_filename:
+        if not self.input_filename:
+            return
+        self.close_input()
+
+        if self.input_mode == "iter":
+            self.input_data = self.iter_input()
+        elif self.input_mode == "mmap":
+            with open(self.input_filename, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    # Empty files cannot be mapped
+                    self.input_data = memoryview(b"")
+                else:
+                    self.input_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                    self.input_data = memoryview(self.input_mmap)
+        else:
             with open(self.input_filename, 'r') as f:
                 self.input_data = [x.replace("\n", "") for x in f.readlines()]
-                if len(self.input_data) == 1:
-                    self.input_data = self.input_data[0]
+            if len(self.input_data) == 1:
+                self.input_data = self.input_data[0]
+
+    def close_input(self):
+        """
+        Closes the memory map of the "mmap" input mode, if there is one. The input cannot be used after this.
+        """
+        if self.input_mmap is None:
+            return
+        try:
+            if isinstance(self.input_data, memoryview):
+                self.input_data.release()
+            self.input_mmap.close()
+        except BufferError:
+            # The day still holds on to a view of it, the map is closed once that is garbage collected
+            pass
+        self.input_mmap = None
+        self.input_data = None
+
+    def snapshot(self, budget: float = None):
+        """
+        Returns a copy of the state that common() left on this instance, so it can be restored before part 2 instead
+        of running common() again. Days that keep their state outside of the instance should override this together
+        with restore(). Returns None if the state cannot be copied, or if copying took longer than budget seconds (the
+        time common() took), in which case common() is simply run again.
+        """
+        state = {k: v for k, v in vars(self).items() if k not in self.snapshot_exclude}
+        if self.snapshot_mode == "share":
+            return state
+
+        deadline = None if budget is None else time.perf_counter() + budget
+        memo = {}
+        try:
+            # One attribute at a time, to give up as soon as it gets too expensive
+            for key, value in state.items():
+                state[key] = copy.deepcopy(value, memo)
+                if deadline is not None and time.perf_counter() > deadline:
+                    return None
+        except (RecursionError, TypeError, copy.Error):
+            return None
+        return state
+
+    def keeps_snapshot(self) -> bool:
+        # The parse cache always needs the state, to store it
+        if self.parse_cache:
+            return True
+        return self.snapshot_mode != "rerun" and type(self).common is not AOCDay.common
+
+    def restore(self, state):
+        for key in set(vars(self).keys()) - set(state.keys()) - set(self.snapshot_exclude):
+            delattr(self, key)
+        # Parse caches from before an attribute was excluded can still hold it
+        vars(self).update((key, value) for key, value in state.items() if key not in self.snapshot_exclude)
+
+    def parse_cache_key(self):
+        return aoccache.file_hash(self.input_filename), aoccache.source_hash(type(self))
+
+    def answer_cache_key(self):
+        # Changes to the runner itself can change the output too, and so does the verbosity: a quiet run never formats
+        # what it leaves out, so its output cannot be replayed for a normal run
+        return (aoccache.file_hash(self.input_filename), aoccache.source_hash(type(self)),
+                aoccache.source_hash(AOCDay), self.creator, self.verbosity)
+
+    def replay(self, cached):
+        """
+        Replays a run from the answer cache: restores the output file, answers and timings of the run that was
+        cached, and shows them like a normal run would.
+        """
+        text, self.results, self.timings = cached
+        with open(self.output_filename, 'w') as output_file:
+            output_file.write(text)
+
+        if self.verbosity != aocoutput.VERBOSITY_FILE:
+            # The output of a run with the same verbosity, so already only the answers in quiet mode
+            print(text, end="")
+        if self.verbosity == aocoutput.VERBOSITY_NORMAL:
+            print("== Replayed from the answer cache, the input and the solution did not change ==")
+            print("")
+        return self.timings
 
     def run(self):
+        """
+        Runs common() and both parts, writing everything they yield to the console and the output file.
+        Returns the time in seconds spent in every phase (also available as self.timings afterwards): loading the
+        input, common(), taking and restoring the snapshot, and for common() and each part the time spent computing
+        separately from the time spent rendering and writing what it yielded (the *_output phases).
+        """
+        self.timings = timings = {phase: 0.0 for phase in self.timing_phases}
+        self.results = {}
+
         self.download_input()
+
+        if self.answer_cache:
+            answer_cache_filename = aoccache.cache_filename("answers", self.day_number, self.identity())
+            answer_cache_key = self.answer_cache_key()
+            if not self.force:
+                cached = aoccache.load(answer_cache_filename, answer_cache_key)
+                if cached is not None:
+                    return self.replay(cached)
+
+        start_time = time.perf_counter()
         self.load_input()
+        timings['load_input'] = time.perf_counter() - start_time
 
         if os.path.isfile(self.output_filename):
             os.remove(self.output_filename)
 
-        with open(self.output_filename, 'w') as output_file:
-            def dprint(thing):
-                print(thing, file=output_file)
-                print(thing)
+        with contextlib.ExitStack() as stack:
+            # Last thing to do, also when a part fails
+            stack.callback(self.close_input)
+            output_file = stack.enter_context(open(self.output_filename, 'w'))
+            sink = aocoutput.OutputSink(output_file, self.verbosity, sys.stdout)
+            if self.verbosity != aocoutput.VERBOSITY_NORMAL:
+                # Also silence days that print() instead of yielding
+                stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, 'w'))))
+
+            def run_phase(phase, function, show=True, collect=False):
+                # Time the computation (including every step of the generator) separately from writing its output
+                start = time.perf_counter()
+                result = function(input_data)
+                timings[phase] += time.perf_counter() - start
+
+                count = 0
+                lines = []
+                last = None
+                if result:
+                    iterator = iter(result)
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            x = next(iterator)
+                        except StopIteration:
+                            timings[phase] += time.perf_counter() - start
+                            break
+                        rendered = time.perf_counter()
+                        timings[phase] += rendered - start
 
+                        count += 1
+                        last = x
+                        if collect:
+                            lines.append(str(x))
+                        if show:
+                            if count == 1 and phase == "common":
+                                sink.line("== Common ==")
+                            sink.item(x)
+                        timings[phase + "_output"] += time.perf_counter() - rendered
+                return count, lines, last
+
+            # Common only prints progress information, which quiet mode leaves out
+            show_common = self.verbosity != aocoutput.VERBOSITY_QUIET
             input_data = self.input_data
 
-            start_time = time.time()
-            common = self.common(input_data)
-            if common:
-                dprint("== Common ==")
-                for x in common:
-                    dprint(x)
-                dprint("")
-    
-            dprint("== Part 1 ==")
-            part1 = self.part1(input_data)
-            printed = False
-            if part1:
-                for x in part1:
-                    if not printed:
-                        printed = True
-                    dprint(x)
-            if not printed:
-                dprint("(no output)")
-            dprint("== Ran in {:.3f} ms ==".format((time.time() - start_time)*1000))
-            dprint("")
-
-            start_time = time.time()
-            common = self.common(input_data)
-            if common:
-                dprint("== Common ==")
-                for x in common:
-                    dprint(x)
-                dprint("")
-    
-            dprint("== Part 2 ==")
-            part2 = self.part2(input_data)
-            printed = False
-            if part2:
-                for x in part2:
-                    if not printed:
-                        printed = True
-                    dprint(x)
-            if not printed:
-                dprint("(no output)")
-            dprint("== Ran in {:.3f} ms ==".format((time.time() - start_time)*1000))
-            dprint("")
+            start_time = time.perf_counter()
+            cached = None
+            if self.parse_cache:
+                cache_filename = aoccache.cache_filename("parsed", self.day_number, self.identity())
+                cache_key = self.parse_cache_key()
+                cached = aoccache.load(cache_filename, cache_key)
+
+            if cached is not None:
+                # Replay what common() printed, and continue from the state it built last time
+                common_lines, state = cached
+                self.restore(state)
+                timings['common'] = time.perf_counter() - start_time
+
+                start_time = time.perf_counter()
+                if common_lines and show_common:
+                    sink.line("== Common ==")
+                    for x in common_lines:
+                        sink.item(x)
+                timings['common_output'] = time.perf_counter() - start_time
+                common_count = len(common_lines)
+            else:
+                common_count, common_lines, _ = run_phase("common", self.common, show=show_common,
+                                                       collect=self.parse_cache)
+            if common_count and show_common:
+                sink.end_section()
+                sink.line("")
+
+            start_time = time.perf_counter()
+            snapshot = None
+            if self.keeps_snapshot():
+                snapshot = self.snapshot(None if self.parse_cache else timings['common'])
+            if self.parse_cache and cached is None and snapshot is not None:
+                aoccache.store(cache_filename, cache_key, (common_lines, snapshot))
+            timings['snapshot'] = time.perf_counter() - start_time
+
+            for part in [1, 2]:
+                phase = "part{}".format(part)
+
+                if part == 2:
+                    start_time = time.perf_counter()
+                    if snapshot is not None:
+                        self.restore(snapshot)
+                    else:
+                        if self.input_mode != "lines":
+                            # The lazy input was used up by the first run of common()
+                            self.load_input()
+                            input_data = self.input_data
+                        if run_phase("common", self.common, show=show_common)[0] and show_common:
+                            sink.end_section()
+                            sink.line("")
+                    timings['restore'] = time.perf_counter() - start_time
+
+                sink.detail("== Part {} ==".format(part))
+                if self.budget is not None:
+                    result = self.run_part_in_worker(phase, input_data, sink)
+                else:
+                    count, _, last = run_phase(phase, getattr(self, phase))
+                    result = {'status': "ok", 'answer': str(last) if count else None, 'items': count,
+                              'elapsed': timings[phase] + timings[phase + "_output"], 'day': self.day_number,
+                              'creator': self.creator, 'part': phase}
+                self.results[phase] = result
+
+                start_time = time.perf_counter()
+                # A part that did not finish gets the line below instead
+                if not sink.end_section() and result['status'] == "ok":
+                    sink.line("(no output)")
+                timings[phase + "_output"] += time.perf_counter() - start_time
+                # These name the day and part, as quiet mode has no headers
+                if result['status'] == "timeout":
+                    sink.line("== Day {} part {} timed out after {:.3f} s (budget {} s), yielded {} things before it "
+                              "was stopped ==".format(self.day_number, part, result['elapsed'], result['budget'],
+                                                      result['items']))
+                elif result['status'] == "error":
+                    sink.line("== Day {} part {} failed after {:.3f} s ==".format(self.day_number, part,
+                                                                                result['elapsed']))
+                    sink.line(result['error'])
+                sink.detail("== Ran in {:.3f} ms ==".format((timings[phase] + timings[phase + "_output"])*1000))
+                sink.detail("")
+
+            sink.detail("== Timings ==")
+            for phase, duration in timings.items():
+                sink.detail("{:<15} {:>12.3f} ms".format(phase.replace("_", " ") + ":", duration*1000))
+            sink.detail("")
+
+            if cached is not None:
+                sink.detail("== Common loaded from parse cache in {:.3f} ms ==".format(timings['common']*1000))
+                sink.detail("")
+            elif snapshot is not None:
+                snapshot_time = timings['snapshot'] + timings['restore']
+                sink.detail("== Common ran once in {:.3f} ms, snapshot and restore took {:.3f} ms ({:.3f} ms saved) ==".format(
+                    timings['common']*1000, snapshot_time*1000, (timings['common'] - snapshot_time)*1000
+                ))
+                sink.detail("")
+            sink.close()
+
+        if self.answer_cache and all(result['status'] == "ok" for result in self.results.values()):
+            with open(self.output_filename, 'r') as output_file:
+                aoccache.store(answer_cache_filename, answer_cache_key, (output_file.read(), self.results, timings))
+
+        return timings
+
+    def run_part_in_worker(self, phase, input_data, sink):
+        """
+        Runs a part in a separate process, writing what it yields to the sink as it comes in. The process is killed
+        if the part takes longer than the budget. Returns the structured result of the part: its status ("ok",
+        "timeout" or "error"), the last thing it yielded if it finished (what it yielded before it was stopped is only
+        progress), how many things it yielded and how long it took.
+        """
+        # Quiet mode only shows the answer, so the worker does not need to format anything else
+        show_items = self.verbosity != aocoutput.VERBOSITY_QUIET
+        result = {'status': "timeout", 'answer': None, 'items': 0, 'budget': self.budget, 'day': self.day_number,
+                  'creator': self.creator, 'part': phase}
+        output_time = 0.0
+
+        def on_message(kind, value):
+            nonlocal output_time
+            if kind != "item":
+                return True
+            rendered = time.perf_counter()
+            result['items'] += 1
+            if show_items:
+                sink.item(value)
+            output_time += time.perf_counter() - rendered
+            return False
+
+        start_time = time.perf_counter()
+        kind, value = aocrunner.run_in_process(self.part_worker, (phase, input_data, show_items), self.budget,
+                                               on_message)
+        compute_time = None
+        if kind == "done":
+            compute_time, result['answer'] = value
+            result['status'] = "ok"
+            if not show_items and result['answer'] is not None:
+                sink.item(result['answer'])
+        elif kind == "error":
+            result['status'], result['error'] = "error", value
+
+        result['elapsed'] = time.perf_counter() - start_time
+        self.timings[phase] += compute_time if compute_time is not None else result['elapsed'] - output_time
+        self.timings[phase + "_output"] += output_time
+        return result
+
+    def part_worker(self, phase, input_data, show_items, connection):
+        # Runs in the worker process of run_part_in_worker, and sends everything back through the connection. Items
+        # are only formatted if they are shown, otherwise only the last one is (as the answer) once the part is done.
+        # noinspection PyBroadException
+        try:
+            start_time = time.perf_counter()
+            result = getattr(self, phase)(input_data)
+            compute_time = time.perf_counter() - start_time
+            count, last, text = 0, None, None
+            if result:
+                iterator = iter(result)
+                while True:
+                    start_time = time.perf_counter()
+                    try:
+                        x = next(iterator)
+                    except StopIteration:
+                        compute_time += time.perf_counter() - start_time
+                        break
+                    compute_time += time.perf_counter() - start_time
+                    count, last, text = count + 1, x, None
+                    if show_items:
+                        text = str(x)
+                    connection.send(("item", text))
+            if count and text is None:
+                text = str(last)
+            connection.send(("done", (compute_time, text)))
+        except Exception:
+            connection.send(("error", traceback.format_exc()))
+        finally:
+            connection.close()
+
+    @staticmethod
+    def generate_input(size: int, rng: random.Random) -> List[str]:
+        """
+        Returns the lines of a valid, randomly generated input for this day, that grows with size (what size means
+        differs per day, and is documented on the day itself). Used by run.py scaling to see how a solution scales.
+        """
+        raise NotImplementedError("This day cannot generate inputs")
 
     def common(self, input_data) -> Generator:
         pass
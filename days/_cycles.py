@@ -0,0 +1,108 @@
+from typing import Callable, Dict, Hashable, Iterable, Iterator, NamedTuple, Optional, Tuple, TypeVar
+
+State = TypeVar("State")
+Fingerprint = Callable[[State], Hashable]
+
+# What an iterator returns when it runs out, as states themselves can be None
+_END = object()
+
+
+class Cycle(NamedTuple):
+    """
+    A sequence of states that repeats: from generation start (mu) on, every state is the same as the one length
+    (lambda) generations before it.
+    """
+    start: int
+    length: int
+
+    @property
+    def end(self) -> int:
+        # The first generation that is a repeat, so also the number of different states
+        return self.start + self.length
+
+    def extrapolate(self, target: int) -> Tuple[int, int]:
+        """
+        Returns the generation before end() that has the same state as generation target, and how many cycles lie
+        between the two.
+        """
+        if target < self.start:
+            return target, 0
+        cycles, offset = divmod(target - self.start, self.length)
+        return self.start + offset, cycles
+
+
+class CycleDetector:
+    """
+    Finds the first state that was seen before, by keeping a dict from the fingerprint of every state to its
+    generation. The fingerprint is the state itself if it is hashable, or something small and hashable that is equal
+    for two states exactly when the states are (like the bytes of a grid instead of the grid). Keeps a fingerprint per
+    generation until the cycle is found; see brent() for when that is too much.
+    """
+    fingerprint: Optional[Fingerprint]
+    seen: Dict[Hashable, int]
+    generation: int
+
+    def __init__(self, fingerprint: Fingerprint = None):
+        self.fingerprint = fingerprint
+        self.seen = {}
+        self.generation = 0
+
+    def add(self, state) -> Optional[Cycle]:
+        """
+        Adds the state of the next generation (the first one is generation 0). Returns the cycle if the state was seen
+        before, and None otherwise.
+        """
+        key = state if self.fingerprint is None else self.fingerprint(state)
+        start = self.seen.setdefault(key, self.generation)
+        if start != self.generation:
+            return Cycle(start, self.generation - start)
+        self.generation += 1
+        return None
+
+
+def find_cycle(states: Iterable, fingerprint: Fingerprint = None) -> Optional[Cycle]:
+    """
+    Returns the cycle of the states with a CycleDetector, or None if they run out before one repeats.
+    """
+    detector = CycleDetector(fingerprint)
+    for state in states:
+        cycle = detector.add(state)
+        if cycle is not None:
+            return cycle
+    return None
+
+
+def brent(states: Callable[[], Iterator], fingerprint: Fingerprint = None) -> Optional[Cycle]:
+    """
+    Returns the same as find_cycle(states()) with Brent's cycle detection, which only keeps two fingerprints in memory,
+    but goes through the states about three times. states is called once for every pass, and has to start from the same
+    state every time. Returns None if the states run out before one repeats.
+    """
+    def fingerprints() -> Iterator:
+        return iter(states()) if fingerprint is None else map(fingerprint, states())
+
+    # Find the length: the hare runs ahead, and the tortoise jumps to it after every power of two
+    sequence = fingerprints()
+    tortoise = next(sequence, _END)
+    if tortoise is _END:
+        return None
+    hare = next(sequence, _END)
+    power = length = 1
+    while tortoise != hare:
+        if hare is _END:
+            return None
+        if power == length:
+            tortoise = hare
+            power *= 2
+            length = 0
+        hare = next(sequence, _END)
+        length += 1
+
+    # Find the start, with one pass length generations ahead of the other
+    behind, ahead = fingerprints(), fingerprints()
+    for _ in range(length):
+        next(ahead)
+    start = 0
+    while next(behind) != next(ahead):
+        start += 1
+    return Cycle(start, length)
@@ -0,0 +1,514 @@
+import hashlib
+import re
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+
+# An instruction as it is written: the name of its opcode and its three arguments
+Instruction = Tuple[str, int, int, int]
+
+
+# Every opcode changes the registers in place, and returns them for convenience
+def addr(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = regs[a] + regs[b]
+    return regs
+
+
+def addi(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = regs[a] + b
+    return regs
+
+
+def mulr(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = regs[a] * regs[b]
+    return regs
+
+
+def muli(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = regs[a] * b
+    return regs
+
+
+def banr(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = regs[a] & regs[b]
+    return regs
+
+
+def bani(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = regs[a] & b
+    return regs
+
+
+def borr(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = regs[a] | regs[b]
+    return regs
+
+
+def bori(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = regs[a] | b
+    return regs
+
+
+def setr(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = regs[a]
+    return regs
+
+
+def seti(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = a
+    return regs
+
+
+def gtir(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = 1 if a > regs[b] else 0
+    return regs
+
+
+def gtri(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = 1 if regs[a] > b else 0
+    return regs
+
+
+def gtrr(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = 1 if regs[a] > regs[b] else 0
+    return regs
+
+
+def eqir(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = 1 if a == regs[b] else 0
+    return regs
+
+
+def eqri(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = 1 if regs[a] == b else 0
+    return regs
+
+
+def eqrr(regs: List[int], a: int, b: int, c: int) -> List[int]:
+    regs[c] = 1 if regs[a] == regs[b] else 0
+    return regs
+
+
+OPCODES = {
+    "addr": addr,
+    "addi": addi,
+    "mulr": mulr,
+    "muli": muli,
+    "banr": banr,
+    "bani": bani,
+    "borr": borr,
+    "bori": bori,
+    "setr": setr,
+    "seti": seti,
+    "gtir": gtir,
+    "gtri": gtri,
+    "gtrr": gtrr,
+    "eqir": eqir,
+    "eqri": eqri,
+    "eqrr": eqrr,
+}
+
+# The opcodes in a fixed order, for masks with a bit per opcode
+OPCODE_NAMES = list(OPCODES)
+
+
+def parse_program(lines: List[str]) -> Tuple[int, List[Instruction]]:
+    """
+    Parses a program with an optional "#ip n" line in front of it. Returns the register the instruction pointer is
+    bound to (-1 if it is not bound to one) and the instructions.
+    """
+    pc_register = -1
+    if lines and lines[0].startswith("#ip"):
+        pc_register = int(re.findall(r'\d+', lines[0])[0])
+        lines = lines[1:]
+
+    program = []
+    for line in lines:
+        parts = line.split(" ")
+        program.append((parts[0], int(parts[1]), int(parts[2]), int(parts[3])))
+    return pc_register, program
+
+
+def find_register_check(program: List[Instruction], register: int = 0) -> Optional[Tuple[int, int]]:
+    """
+    Finds the first instruction that checks whether a register is equal to another register. Returns its pc and the
+    other register, or None if the program never does that.
+    """
+    for pc, (name, a, b, c) in enumerate(program):
+        if name == "eqrr" and register in (a, b) and a != b:
+            return pc, b if a == register else a
+    return None
+
+
+# The opcodes as Python expressions, for compile_program(). {ra} and {rb} are a and b as registers, {a} and {b} as
+# values.
+EXPRESSIONS = {
+    "addr": "{ra} + {rb}",
+    "addi": "{ra} + {b}",
+    "mulr": "{ra} * {rb}",
+    "muli": "{ra} * {b}",
+    "banr": "{ra} & {rb}",
+    "bani": "{ra} & {b}",
+    "borr": "{ra} | {rb}",
+    "bori": "{ra} | {b}",
+    "setr": "{ra}",
+    "seti": "{a}",
+    "gtir": "1 if {a} > {rb} else 0",
+    "gtri": "1 if {ra} > {b} else 0",
+    "gtrr": "1 if {ra} > {rb} else 0",
+    "eqir": "1 if {a} == {rb} else 0",
+    "eqri": "1 if {ra} == {b} else 0",
+    "eqrr": "1 if {ra} == {rb} else 0",
+}
+
+# Opcodes that always store 0 or 1, so jumps that add them to the instruction pointer can become if statements
+COMPARISONS = {"gtir", "gtri", "gtrr", "eqir", "eqri", "eqrr"}
+
+# Opcodes whose operands can be swapped
+COMMUTATIVE = {"addr", "mulr", "banr", "borr", "eqrr"}
+
+# Loops that compile_program() replaces by what they compute, when the program gets to their first instruction (the
+# head). Every idiom has:
+# - its instructions, with registers as capital letters (every letter a different register), "ip" for the register of
+#   the instruction pointer, "#name" for any value, "_" for anything, and {back} for the jump back to the head
+# - a condition under which the replacement does the same as the loop ("True" for always)
+# - the statements that replace it, which leave the registers exactly like the loop would
+# - where the loop ends up afterwards: after its last instruction, or #exit + 1 for idioms that jump out with #exit
+IDIOMS = {
+    # P += X, C times
+    "multiplication": (
+        ["addr X P P", "addi C 1 C", "gtrr C N T", "addr T ip ip", "seti {back} _ ip"],
+        "True",
+        ["{P} += {X} * (max({C}, {N}) - {C} + 1)", "{C} = max({C}, {N}) + 1", "{T} = 1"],
+    ),
+    # Q = D // k, by counting Q up until (Q + 1) * k is more than D
+    "division": (
+        ["addi Q 1 T", "muli T #k T", "gtrr T D T", "addr T ip ip", "addi ip 1 ip", "seti #exit _ ip", "addi Q 1 Q",
+         "seti {back} _ ip"],
+        "{k} > 0",
+        ["{Q} = max({Q}, {D} // {k})", "{T} = 1"],
+    ),
+    # S += A if A is a divisor of N (with the other divisor at least B), by trying every B up to N
+    "divisor test": (
+        ["mulr A B T", "eqrr T N T", "addr T ip ip", "addi ip 1 ip", "addr A S S", "addi B 1 B", "gtrr B N T",
+         "addr ip T ip", "seti {back} _ ip"],
+        "{A} >= 1 and {N} >= 1",
+        ["{S} += {A} if {N} % {A} == 0 and {B} <= {N} // {A} else 0", "{B} = max({B}, {N}) + 1", "{T} = 1"],
+    ),
+    # S += the sum of the divisors of N that are at least A, with the divisor test above for every A up to N
+    "divisor sum": (
+        ["seti 1 _ B", "mulr A B T", "eqrr T N T", "addr T ip ip", "addi ip 1 ip", "addr A S S", "addi B 1 B",
+         "gtrr B N T", "addr ip T ip", "seti {head} _ ip", "addi A 1 A", "gtrr A N T", "addr T ip ip",
+         "seti {back} _ ip"],
+        "{A} >= 1 and {N} >= 1",
+        ["{S} += divisor_sum({N}, {A})", "{A} = max({A}, {N}) + 1", "{B} = {N} + 1", "{T} = 1"],
+    ),
+}
+
+
+def divisor_sum(n: int, minimum: int = 1) -> int:
+    """
+    Returns the sum of the divisors of n (which should be positive) that are at least minimum.
+    """
+    total = 0
+    d = 1
+    while d * d <= n:
+        if n % d == 0:
+            total += d if d >= minimum else 0
+            if d * d != n:
+                total += n // d if n // d >= minimum else 0
+        d += 1
+    return total
+
+
+def match_idiom(pattern: List[str], program: List[Instruction], head: int, pc_register: int) -> Optional[Dict]:
+    """
+    Matches the instructions of an idiom against the program from head on. Returns what the letters and #names stand
+    for, or None if the program does not do that there.
+    """
+    if head + len(pattern) > len(program):
+        return None
+
+    def bind(bindings: Dict[str, int], token: str, value: int, register: bool) -> bool:
+        if token == "_":
+            return True
+        if token == "ip":
+            return register and value == pc_register
+        if token.startswith("#") or token.isupper():
+            if register and value == pc_register:
+                return False
+            if token in bindings:
+                return bindings[token] == value
+            # Every letter is another register
+            if token.isupper() and value in (v for k, v in bindings.items() if k.isupper()):
+                return False
+            bindings[token] = value
+            return True
+        return int(token) == value
+
+    def match(offset: int, bindings: Dict[str, int]) -> Optional[Dict[str, int]]:
+        if offset == len(pattern):
+            return bindings
+        name, a, b, c = pattern[offset].format(head=head, back=head - 1).split(" ")
+        actual = program[head + offset]
+        if actual[0] != name:
+            return None
+        register_a, register_b = "{ra}" in EXPRESSIONS[name], "{rb}" in EXPRESSIONS[name]
+        orders = [(actual[1], actual[2])] + ([(actual[2], actual[1])] if name in COMMUTATIVE else [])
+        for value_a, value_b in orders:
+            # Try the other order if this one does not work out later on
+            attempt = dict(bindings)
+            if bind(attempt, a, value_a, register_a) and bind(attempt, b, value_b, register_b) and \
+                    bind(attempt, c, actual[3], True):
+                result = match(offset + 1, attempt)
+                if result is not None:
+                    return result
+        return None
+
+    bindings = match(0, {})
+    if bindings is None:
+        return None
+    return {token.lstrip("#"): value for token, value in bindings.items()}
+
+
+def find_idioms(program: List[Instruction], pc_register: int) -> Dict[int, Tuple[str, str, List[str], int, int]]:
+    """
+    Finds the idioms in a program. Returns for every head the name of the idiom, its condition and statements (with
+    the registers filled in), where it ends up afterwards, and the amount of instructions it replaces.
+    """
+    found = {}
+    if pc_register < 0:
+        return found
+    for head in range(len(program)):
+        for name, (pattern, condition, statements) in IDIOMS.items():
+            bindings = match_idiom(pattern, program, head, pc_register)
+            if bindings is None:
+                continue
+            values = {k: ("r{}".format(v) if k.isupper() else v) for k, v in bindings.items()}
+            exit_pc = bindings['exit'] + 1 if 'exit' in bindings else head + len(pattern)
+            found[head] = (name, condition.format(**values), [x.format(**values) for x in statements], exit_pc,
+                           len(pattern))
+    return found
+
+
+# Compiled programs by the hash of their instructions (and whatever else changes the compiled code)
+_compiled: Dict[str, Optional[Callable[[List[int], int], int]]] = {}
+
+
+def read_registers(instruction: Instruction) -> List[int]:
+    name, a, b, c = instruction
+    return ([a] if "{ra}" in EXPRESSIONS[name] else []) + ([b] if "{rb}" in EXPRESSIONS[name] else [])
+
+
+def compile_program(program: List[Instruction], pc_register: int, register_count: int,
+                    breakpoints: Iterable[int] = ()) -> Optional[Callable[[List[int], int], int]]:
+    """
+    Compiles a program to a Python function run(registers, pc) that does exactly what Machine.run() does: it runs the
+    program from pc until it halts or is about to run one of the breakpoints, changes the registers in place, and
+    returns the pc it stopped at. Programs are compiled once and then cached by their hash. Returns None if the
+    program cannot be compiled (because it uses registers that do not exist).
+    Loops that are one of the IDIOMS are replaced by what they compute, unless there is a breakpoint inside of them.
+    """
+    breakpoints = frozenset(breakpoints)
+    key = hashlib.sha256(repr((program, pc_register, register_count, sorted(breakpoints))).encode()).hexdigest()
+    if key not in _compiled:
+        _compiled[key] = _compile(program, pc_register, register_count, breakpoints)
+    return _compiled[key]
+
+
+def _compile(program: List[Instruction], pc_register: int, register_count: int,
+             breakpoints: FrozenSet[int]) -> Optional[Callable[[List[int], int], int]]:
+    for instruction in program:
+        if any(not 0 <= r < register_count for r in read_registers(instruction) + [instruction[3]]):
+            return None
+
+    size = len(program)
+    names = ["r{}".format(i) for i in range(register_count)]
+    # Instructions compiled per entry point at most, so the code stays small for long programs
+    budget = max(8, min(64, 4096 // max(size, 1)))
+    idioms = {head: idiom for head, idiom in find_idioms(program, pc_register).items()
+              if not any(head < pc < head + idiom[4] for pc in breakpoints)}
+
+    def expression(i: int, known: Dict[int, int]) -> str:
+        # The instruction at i as an expression, with the registers in known replaced by their values
+        name, a, b, c = program[i]
+        return "({})".format(EXPRESSIONS[name].format(
+            a=a, b=b, ra=known.get(a, names[a]) if "{ra}" in EXPRESSIONS[name] else "",
+            rb=known.get(b, names[b]) if "{rb}" in EXPRESSIONS[name] else "",
+        ))
+
+    def trace(entry: int) -> List[str]:
+        """
+        Compiles the code from entry on, as the body of a while loop. Instructions run one after another without going
+        back to the dispatcher, and jumps to a known target (or to one of two known targets, depending on the result
+        of a comparison) are followed, until the code gets back to entry (continue) or has to go back to the
+        dispatcher (break, with pc set to where to go on).
+        """
+        lines = []
+        emitted = [0]
+
+        def goto(target: int, path: Set[int], booleans: Set[int], indent: str):
+            if target == entry and target not in breakpoints:
+                lines.append(indent + "continue")
+            elif not 0 <= target < size or target in breakpoints or target in path or emitted[0] >= budget:
+                lines.append(indent + "pc = {}".format(target))
+                lines.append(indent + "break")
+            else:
+                walk(target, path | {target}, booleans, indent)
+
+        def walk(i: int, path: Set[int], booleans: Set[int], indent: str):
+            if i in idioms:
+                idiom, condition, statements, exit_pc, length = idioms[i]
+                emitted[0] += len(statements)
+                lines.append(indent + "# {}".format(idiom))
+                lines.append(indent + "if {}:".format(condition))
+                lines.extend(indent + "    " + statement for statement in statements)
+                # Registers that the loop changes are no longer known to be booleans
+                changed = set(int(statement.split(" ")[0][1:]) for statement in statements)
+                goto(exit_pc, path, booleans - changed, indent + "    ")
+                if condition == "True":
+                    return
+
+            name, a, b, c = program[i]
+            emitted[0] += 1
+            # The instruction pointer is always i while running the instruction at i
+            known = {pc_register: i}
+
+            if c != pc_register:
+                lines.append(indent + "{} = {}".format(names[c], expression(i, known)[1:-1]))
+                booleans = (booleans - {c}) | ({c} if name in COMPARISONS else set())
+                goto(i + 1, path, booleans, indent)
+                return
+
+            # A jump
+            variables = set(r for r in read_registers(program[i]) if r != pc_register)
+            if not variables:
+                goto(eval(expression(i, known)) + 1, path, booleans, indent)
+            elif len(variables) == 1 and variables <= booleans:
+                register = variables.pop()
+                if_false, if_true = [eval(expression(i, {**known, register: value})) + 1 for value in (0, 1)]
+                lines.append(indent + "if {}:".format(names[register]))
+                goto(if_true, path, booleans, indent + "    ")
+                lines.append(indent + "else:")
+                goto(if_false, path, booleans, indent + "    ")
+            else:
+                lines.append(indent + "pc = {} + 1".format(expression(i, known)))
+                lines.append(indent + "break")
+
+        walk(entry, {entry}, set(), "")
+        return lines
+
+    def dispatch(low: int, high: int, indent: str) -> List[str]:
+        # Finds the code for pc with a binary tree of if statements
+        if high - low == 1:
+            return [indent + "while True:"] + [indent + "    " + line for line in trace(low)]
+        middle = (low + high) // 2
+        return ([indent + "if pc < {}:".format(middle)] + dispatch(low, middle, indent + "    ") +
+                [indent + "else:"] + dispatch(middle, high, indent + "    "))
+
+    lines = [
+        "def run(registers, pc):",
+        "    if not 0 <= pc < {}:".format(size),
+        "        return pc",
+        "    {}, = registers".format(", ".join(names)),
+        "    while 0 <= pc < {}:".format(size),
+    ]
+    lines += dispatch(0, size, " " * 8) if size else ["        pass"]
+    if breakpoints:
+        lines += ["        if pc in breakpoints:", "            break"]
+    lines += ["    registers[:] = [{}]".format(", ".join(names))]
+    if pc_register >= 0:
+        # Like the interpreter leaves it after the last instruction
+        lines += ["    registers[{}] = pc - 1".format(pc_register)]
+    lines += ["    return pc"]
+
+    namespace = {'breakpoints': breakpoints, 'divisor_sum': divisor_sum}
+    exec(compile("\n".join(lines), "<elfcode>", "exec"), namespace)
+    return namespace['run']
+
+
+class Machine:
+    """
+    Runs an ElfCode program. The opcodes are looked up once when the machine is created, and the instructions then
+    change the registers in place. With compiled, the program is compiled to Python first (see compile_program()),
+    which is worth it for programs that run for a long time.
+    """
+    program: List[Instruction]
+    code: List[Tuple[Callable, int, int, int]]
+    pc_register: int = -1
+    registers: List[int]
+    pc: int = 0
+    compiled: bool = False
+    functions: Dict[FrozenSet[int], Callable[[List[int], int], int]]
+
+    def __init__(self, program: List[Instruction], pc_register: int = -1, registers: Optional[List[int]] = None,
+                 compiled: bool = False):
+        self.program = program
+        self.code = [(OPCODES[name], a, b, c) for name, a, b, c in program]
+        self.pc_register = pc_register
+        self.registers = list(registers) if registers is not None else [0] * 6
+        self.pc = 0
+        self.compiled = compiled
+        # The compiled program for every set of breakpoints it ran with, so it is not looked up again on every run
+        self.functions = {}
+
+    @property
+    def halted(self) -> bool:
+        return not 0 <= self.pc < len(self.code)
+
+    def run(self, breakpoints: Iterable[int] = ()) -> bool:
+        """
+        Runs the program until it halts, or until it is about to execute one of the instructions in breakpoints (the
+        instruction it starts at does not count, so calling this again continues after the breakpoint). Returns True
+        if the program halted, and False if it stopped at a breakpoint (self.pc tells which one).
+        """
+        if self.compiled:
+            breakpoints = frozenset(breakpoints)
+            if breakpoints not in self.functions:
+                self.functions[breakpoints] = compile_program(self.program, self.pc_register, len(self.registers),
+                                                              breakpoints)
+            function = self.functions[breakpoints]
+            if function is not None:
+                self.pc = function(self.registers, self.pc)
+                return self.halted
+
+        code = self.code
+        regs = self.registers
+        ip = self.pc_register
+        pc = self.pc
+        end = len(code)
+        breakpoints = frozenset(breakpoints)
+
+        if ip < 0:
+            # Without a bound instruction pointer the program cannot jump, so it simply runs from top to bottom
+            while 0 <= pc < end:
+                function, a, b, c = code[pc]
+                function(regs, a, b, c)
+                pc += 1
+                if pc in breakpoints:
+                    self.pc = pc
+                    return False
+        elif breakpoints:
+            while 0 <= pc < end:
+                regs[ip] = pc
+                function, a, b, c = code[pc]
+                function(regs, a, b, c)
+                pc = regs[ip] + 1
+                if pc in breakpoints:
+                    self.pc = pc
+                    return False
+        else:
+            while 0 <= pc < end:
+                regs[ip] = pc
+                function, a, b, c = code[pc]
+                function(regs, a, b, c)
+                pc = regs[ip] + 1
+
+        self.pc = pc
+        return True
+
+    def watch(self, pc: int, register: int) -> Iterator[int]:
+        """
+        Runs the program, and yields the value of register every time it is about to execute the instruction at pc,
+        until it halts.
+        """
+        while not self.run(breakpoints=[pc]):
+            yield self.registers[register]
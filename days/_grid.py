@@ -0,0 +1,124 @@
+from typing import Iterator, List, Tuple
+
+
+class Grid:
+    """
+    A rectangular grid of small numbers (0-255), stored as one flat bytearray instead of nested lists of objects, which
+    takes a byte per cell instead of a pointer and an object per cell. Days that read characters can store the
+    characters themselves (see from_lines()), and compare cells with ord("#") and such.
+
+    Cells are addressed with grid[x, y], or in hot loops with the flat index that index() returns. The grid has a border
+    of padding cells around it that are filled with border, so the neighbours of every cell in the grid can be read
+    without checking bounds: offsets4 (in reading order) and offsets8 are what to add to a flat index to get to its
+    neighbours. Coordinates start at (x0, y0), for grids that do not start at the top left.
+    """
+    width: int
+    height: int
+    padding: int
+    stride: int
+    x0: int
+    y0: int
+    offset: int
+    cells: bytearray
+    offsets4: Tuple[int, ...]
+    offsets8: Tuple[int, ...]
+
+    def __init__(self, width: int, height: int, fill: int = 0, padding: int = 1, border: int = None,
+                 x0: int = 0, y0: int = 0):
+        self.width = width
+        self.height = height
+        self.padding = padding
+        self.stride = width + 2 * padding
+        self.x0 = x0
+        self.y0 = y0
+        # index(x, y) is then y * stride + x + offset
+        self.offset = padding * self.stride + padding - y0 * self.stride - x0
+
+        border = fill if border is None else border
+        self.cells = bytearray([border]) * (self.stride * (height + 2 * padding))
+        if fill != border:
+            row = bytes([fill]) * width
+            for start in self.row_starts():
+                self.cells[start:start + width] = row
+
+        self.offsets4 = (-self.stride, -1, 1, self.stride)
+        self.offsets8 = (-self.stride - 1, -self.stride, -self.stride + 1, -1, 1,
+                         self.stride - 1, self.stride, self.stride + 1)
+
+    @classmethod
+    def from_lines(cls, lines: List[str], padding: int = 1, border: int = ord(" ")) -> 'Grid':
+        """
+        Creates a grid with the characters of the lines in its cells. Lines shorter than the longest one are filled up
+        with the border.
+        """
+        grid = cls(max((len(line) for line in lines), default=0), len(lines), border, padding, border)
+        for start, line in zip(grid.row_starts(), lines):
+            grid.cells[start:start + len(line)] = line.encode("latin-1")
+        return grid
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.stride + x + self.offset
+
+    def position(self, index: int) -> Tuple[int, int]:
+        # Relative to the first cell, as x0 can be larger than the stride
+        y, x = divmod(index - self.padding * self.stride - self.padding, self.stride)
+        return x + self.x0, y + self.y0
+
+    def __getitem__(self, position: Tuple[int, int]) -> int:
+        return self.cells[position[1] * self.stride + position[0] + self.offset]
+
+    def __setitem__(self, position: Tuple[int, int], value: int):
+        self.cells[position[1] * self.stride + position[0] + self.offset] = value
+
+    def __contains__(self, position: Tuple[int, int]) -> bool:
+        # Only cells in the grid itself, not the ones in the border
+        return (self.x0 <= position[0] < self.x0 + self.width) and (self.y0 <= position[1] < self.y0 + self.height)
+
+    def __eq__(self, other):
+        if not isinstance(other, Grid):
+            return NotImplemented
+        return (self.width, self.height, self.x0, self.y0, self.cells) == \
+               (other.width, other.height, other.x0, other.y0, other.cells)
+
+    def __str__(self):
+        return "\n".join(row.decode("latin-1") for row in self.rows())
+
+    def row_starts(self) -> range:
+        # Flat index of the first cell of every row
+        start = self.padding * self.stride + self.padding
+        return range(start, start + self.height * self.stride, self.stride)
+
+    def indices(self) -> Iterator[int]:
+        """
+        Returns the flat indices of all cells in the grid (leaving out the border) in reading order.
+        """
+        for start in self.row_starts():
+            yield from range(start, start + self.width)
+
+    def row(self, y: int) -> bytes:
+        start = self.index(self.x0, y)
+        return bytes(self.cells[start:start + self.width])
+
+    def column(self, x: int) -> bytes:
+        start = self.index(x, self.y0)
+        return bytes(self.cells[start:start + self.height * self.stride:self.stride])
+
+    def rows(self) -> List[bytes]:
+        return [bytes(self.cells[start:start + self.width]) for start in self.row_starts()]
+
+    def count(self, value: int) -> int:
+        return sum(self.cells.count(value, start, start + self.width) for start in self.row_starts())
+
+    def copy(self) -> 'Grid':
+        grid = Grid.__new__(Grid)
+        grid.__dict__.update(self.__dict__)
+        grid.cells = bytearray(self.cells)
+        return grid
+
+    def as_array(self):
+        """
+        Returns a NumPy view on the cells (border included), with the rows as the first axis. Changes to it change
+        the grid. Only works if NumPy is installed.
+        """
+        import numpy
+        return numpy.frombuffer(self.cells, dtype=numpy.uint8).reshape(-1, self.stride)
@@ -1,21 +1,28 @@
+import itertools
+
 from days import AOCDay, day
+from days._cycles import CycleDetector
 
 
 @day(1)
 class DayOne(AOCDay):
+    scaling_sizes = [1000, 2000, 4000, 8000]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # size frequency changes, that add up to zero so part 2 always finds a frequency twice
+        changes = [rng.choice([-1, 1]) * rng.randint(1, 20) for _ in range(size - 1)]
+        changes.append(-sum(changes))
+        return ["{:+d}".format(x) for x in changes]
+
     def part1(self, input_data):
         yield sum(map(int, input_data))
 
     def part2(self, input_data):
-        frequency = 0
-        unique_frequencies = set()
-        data = list(map(int, input_data))
-
-        while True:
-            for i in data:
-                if frequency in unique_frequencies:
-                    yield frequency
-                    return
-
-                unique_frequencies.add(frequency)
-                frequency += i
+        # The frequency before every change, over and over; the first one seen twice is the answer
+        changes = itertools.cycle(map(int, input_data))
+        detector = CycleDetector()
+        for frequency in itertools.accumulate(itertools.chain([0], changes)):
+            if detector.add(frequency) is not None:
+                yield frequency
+                return
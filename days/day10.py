@@ -62,6 +62,26 @@ position=<-3,  6> velocity=< 2, -1>"""
 
     points = []
     result: List[List[Optional[Point]]] = [[]]
+    scaling_sizes = [25, 50, 100, 200]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # size points that come together in a small area after 1000 seconds. The first four move at the top speed
+        # in every direction, so the bounding box shrinks on every side until then.
+        seconds = 1000
+        lines = []
+        for i in range(size):
+            if i < 4:
+                x, y = 100, 150
+                velocity_x, velocity_y = [(5, 5), (-5, -5), (5, -5), (-5, 5)][i]
+            else:
+                x, y = rng.randint(100, 160), rng.randint(150, 160)
+                velocity_x, velocity_y = rng.randint(-5, 5), rng.randint(-5, 5)
+            lines.append("position=<{:>6}, {:>6}> velocity=<{:>2}, {:>2}>".format(
+                x - velocity_x * seconds, y - velocity_y * seconds, velocity_x, velocity_y
+            ))
+        rng.shuffle(lines)
+        return lines
 
     def common(self, input_data):
         # input_data = self.test_input.split("\n")
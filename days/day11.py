@@ -1,4 +1,4 @@
-from days import AOCDay, day
+from days import AOCDay, day, Lazy
 
 
 @day(11)
@@ -6,6 +6,12 @@ class DayEleven(AOCDay):
     test_input = "42"
     serial_number: int = None
 
+    @staticmethod
+    def generate_input(size, rng):
+        # The grid is always 300x300, so the input (a serial number) has no size to scale, and there are no
+        # scaling_sizes to sweep
+        return [str(rng.randint(1000, 9999))]
+
     def get_power_level(self, x, y):
         rack_id = x + 10
         power_level = ((rack_id * y) + self.serial_number) * rack_id
@@ -42,7 +48,7 @@ class DayEleven(AOCDay):
         max_power_level = (0, 0, 0, 0)
         size = 0
         for size in range(1, 301):
-            yield "Checking {}x{}".format(size, size)
+            yield Lazy("Checking {}x{}", size, size)
             for x in range(300 - 3):
                 for y in range(300 - 3):
                     power_level_sum = 0
@@ -51,6 +57,6 @@ class DayEleven(AOCDay):
                             power_level_sum += self.get_power_level(x+i, y+j)
                     if power_level_sum > max_power_level[0]:
                         max_power_level = (power_level_sum, x, y, size)
-                        yield "New max power: {}".format(max_power_level)
+                        yield Lazy("New max power: {}", max_power_level)
 
         yield max_power_level[0], max_power_level[1], max_power_level[2], max_power_level[3]
@@ -1,6 +1,8 @@
-from typing import Dict, List, Optional
+import itertools
+from typing import Dict, List, Optional, Tuple
 
-from days import AOCDay, day
+from days import AOCDay, day, Lazy
+from days._cycles import CycleDetector
 
 
 class Pot:
@@ -64,6 +66,18 @@ class DayTwelve(AOCDay):
     current_state = List[bool]
 
     number_of_iterations = 20
+    # The parts change the pots themselves, which takes longer to copy than to build again
+    snapshot_mode = "rerun"
+    scaling_sizes = [100, 200, 400, 800]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # size pots, with rules that make every pot take the plant of the pot to its left. The pattern moves one pot
+        # to the right every generation, so part 2 quickly sees the sum grow by the same amount every time.
+        lines = ["initial state: {}".format("".join(rng.choice("#.") for _ in range(size))), ""]
+        for pattern in itertools.product(".#", repeat=5):
+            lines.append("{} => {}".format("".join(pattern), pattern[1]))
+        return lines
 
     test_input = """initial state: #..#.#..##......###...###
 
@@ -150,146 +164,103 @@ class DayTwelve(AOCDay):
             match, nxt = line.split(" => ")
             self.transitions[match] = nxt == "#"
 
-        yield self.get_state_repr()
+        yield Lazy(self.get_state_repr)
 
     def part1(self, input_data):
-        yield "{:>2}: {}".format(0, self.get_state_repr())
+        yield Lazy("{:>2}: {}", 0, Lazy(self.get_state_repr))
         for iteration in range(1, self.number_of_iterations + 1):
-            last_repr = self.get_state_repr()
-
-            indices_to_flip = []
-
-            start_index = self.first_pot.index - 2
-
-            for i in range(2, len(last_repr)-2):
-                match = last_repr[(i-2):(i+3)]
-                try:
-                    if last_repr[i] != ("#" if self.transitions[match] else "."):
-                        indices_to_flip.append(start_index + i)
-                except KeyError:
-                    yield "{} not in trans".format(match)
-
-            # yield indices_to_flip
-
-            p = self.first_pot
-            while p is not None:
-                if p.index in indices_to_flip:
-                    p.plant = not p.plant
-                    indices_to_flip.remove(p.index)
-                p = p.nxt
-
-            # Check if we need to add new first pots
-            if self.first_pot.plant or self.first_pot.nxt.plant:
-                if self.first_pot.plant:
-                    # Two new pots
-                    new_first_pot = Pot(None, None, False, self.first_pot.index-2)
-                    new_second_pot = Pot(new_first_pot, self.first_pot, False, self.first_pot.index-1)
-                    new_first_pot.nxt = new_second_pot
-                    self.first_pot.prv = new_second_pot
-                    self.first_pot = new_first_pot
-                elif self.first_pot.nxt.plant:
-                    # One new pot
-                    new_first_pot = Pot(None, self.first_pot, False, self.first_pot.index-1)
-                    self.first_pot.prv = new_first_pot
-                    self.first_pot = new_first_pot
-
-            # Check if we need to add new last pots
-            if self.last_pot.plant or self.last_pot.prv.plant:
-                if self.last_pot.plant:
-                    # Two new pots
-                    new_penultimate_pot = Pot(self.last_pot, None, False, self.last_pot.index+1)
-                    new_last_pot = Pot(new_penultimate_pot, None, False, self.last_pot.index+2)
-                    new_penultimate_pot.prv = new_last_pot
-                    self.last_pot.nxt = new_penultimate_pot
-                    self.last_pot = new_last_pot
-                elif self.last_pot.prv.plant:
-                    # One new pot
-                    new_last_pot = Pot(self.last_pot, None, False, self.last_pot.index+1)
-                    self.last_pot.nxt = new_last_pot
-                    self.last_pot = new_last_pot
-
-            yield "{:>2}: {}".format(iteration, self.get_state_repr())
+            yield from self.do_generation()
+            yield Lazy("{:>2}: {}", iteration, Lazy(self.get_state_repr))
 
         yield "So the resulting sum is {}".format(self.get_final_sum())
 
     def part2(self, input_data):
         self.number_of_iterations = 50000000000
-        # yield "{:>2}: {}".format(0, self.get_state_repr())
-
-        difference = 0
-        prevsum = 0
-        history = []
-
-        for iteration in range(1, self.number_of_iterations + 1):
-            last_repr = self.get_state_repr()
-
-            indices_to_flip = []
-
-            start_index = self.first_pot.index - 2
-
-            for i in range(2, len(last_repr)-2):
-                match = last_repr[(i-2):(i+3)]
-                try:
-                    if last_repr[i] != ("#" if self.transitions[match] else "."):
-                        indices_to_flip.append(start_index + i)
-                except KeyError:
-                    yield "{} not in trans".format(match)
-
-            # yield indices_to_flip
-
-            p = self.first_pot
-            while p is not None:
-                if p.index in indices_to_flip:
-                    p.plant = not p.plant
-                    indices_to_flip.remove(p.index)
-                p = p.nxt
-
-            # Check if we need to add new first pots
-            if self.first_pot.plant or self.first_pot.nxt.plant:
-                if self.first_pot.plant:
-                    # Two new pots
-                    new_first_pot = Pot(None, None, False, self.first_pot.index-2)
-                    new_second_pot = Pot(new_first_pot, self.first_pot, False, self.first_pot.index-1)
-                    new_first_pot.nxt = new_second_pot
-                    self.first_pot.prv = new_second_pot
-                    self.first_pot = new_first_pot
-                elif self.first_pot.nxt.plant:
-                    # One new pot
-                    new_first_pot = Pot(None, self.first_pot, False, self.first_pot.index-1)
-                    self.first_pot.prv = new_first_pot
-                    self.first_pot = new_first_pot
-
-            # Check if we need to add new last pots
-            if self.last_pot.plant or self.last_pot.prv.plant:
-                if self.last_pot.plant:
-                    # Two new pots
-                    new_penultimate_pot = Pot(self.last_pot, None, False, self.last_pot.index+1)
-                    new_last_pot = Pot(new_penultimate_pot, None, False, self.last_pot.index+2)
-                    new_penultimate_pot.prv = new_last_pot
-                    self.last_pot.nxt = new_penultimate_pot
-                    self.last_pot = new_last_pot
-                elif self.last_pot.prv.plant:
-                    # One new pot
-                    new_last_pot = Pot(self.last_pot, None, False, self.last_pot.index+1)
-                    self.last_pot.nxt = new_last_pot
-                    self.last_pot = new_last_pot
-
-            final_sum = self.get_final_sum()
-            difference = final_sum - prevsum
-            prevsum = final_sum
-            history.append(difference)
-
-            # yield iteration, final_sum, difference
-
-            if len(history) > 20:
-                history = history[-20:]
-
-            if len(history) == 20 and len(list(set(history))) == 1:
-                yield "Pattern found after loop {}: Adds {} every time".format(iteration, history[0])
-
-                total_sum = final_sum + (self.number_of_iterations - iteration) * history[0]
-                yield "Total sum: {}".format(total_sum)
 
+        # Once the plants form a pattern that was seen before (without the empty pots around it), the pots change the
+        # same way as they did after that, only moved over. Keep the first plant and the sum of every generation to
+        # extrapolate from there.
+        detector = CycleDetector()
+        firsts, sums = [], []
+        for generation in range(self.number_of_iterations + 1):
+            first, pattern = self.get_pattern()
+            firsts.append(first)
+            sums.append(self.get_final_sum())
+            cycle = detector.add(pattern)
+            if cycle is not None:
                 break
-
-        yield "So the resulting sum is {}".format(self.get_final_sum())
+            if generation < self.number_of_iterations:
+                yield from self.do_generation()
+        else:
+            yield "So the resulting sum is {}".format(sums[-1])
+            return
+
+        shift = firsts[cycle.end] - firsts[cycle.start]
+        yield "Pattern of generation {} comes back {} pots further after {} generations".format(
+            cycle.start, shift, cycle.length)
+
+        generation, cycles = cycle.extrapolate(self.number_of_iterations)
+        # Every cycle moves every plant shift pots
+        yield "So the resulting sum is {}".format(sums[generation] + cycles * shift * pattern.count("#"))
+
+    def get_pattern(self) -> Tuple[int, str]:
+        # The index of the first plant, and the pots from there up to the last plant
+        state = self.get_state_repr()
+        pattern = state.strip(".")
+        if not pattern:
+            return 0, pattern
+        return self.first_pot.index - 2 + state.index("#"), pattern
+
+    def do_generation(self):
+        last_repr = self.get_state_repr()
+
+        indices_to_flip = []
+
+        start_index = self.first_pot.index - 2
+
+        for i in range(2, len(last_repr)-2):
+            match = last_repr[(i-2):(i+3)]
+            try:
+                if last_repr[i] != ("#" if self.transitions[match] else "."):
+                    indices_to_flip.append(start_index + i)
+            except KeyError:
+                yield "{} not in trans".format(match)
+
+        # yield indices_to_flip
+
+        p = self.first_pot
+        while p is not None:
+            if p.index in indices_to_flip:
+                p.plant = not p.plant
+                indices_to_flip.remove(p.index)
+            p = p.nxt
+
+        # Check if we need to add new first pots
+        if self.first_pot.plant or self.first_pot.nxt.plant:
+            if self.first_pot.plant:
+                # Two new pots
+                new_first_pot = Pot(None, None, False, self.first_pot.index-2)
+                new_second_pot = Pot(new_first_pot, self.first_pot, False, self.first_pot.index-1)
+                new_first_pot.nxt = new_second_pot
+                self.first_pot.prv = new_second_pot
+                self.first_pot = new_first_pot
+            elif self.first_pot.nxt.plant:
+                # One new pot
+                new_first_pot = Pot(None, self.first_pot, False, self.first_pot.index-1)
+                self.first_pot.prv = new_first_pot
+                self.first_pot = new_first_pot
+
+        # Check if we need to add new last pots
+        if self.last_pot.plant or self.last_pot.prv.plant:
+            if self.last_pot.plant:
+                # Two new pots
+                new_penultimate_pot = Pot(self.last_pot, None, False, self.last_pot.index+1)
+                new_last_pot = Pot(new_penultimate_pot, None, False, self.last_pot.index+2)
+                new_penultimate_pot.prv = new_last_pot
+                self.last_pot.nxt = new_penultimate_pot
+                self.last_pot = new_last_pot
+            elif self.last_pot.prv.plant:
+                # One new pot
+                new_last_pot = Pot(self.last_pot, None, False, self.last_pot.index+1)
+                self.last_pot.nxt = new_last_pot
+                self.last_pot = new_last_pot
@@ -1,7 +1,12 @@
+from collections import defaultdict
 from enum import Enum, IntEnum
 from typing import Tuple, List, Optional
 
-from days import AOCDay, day
+from days import AOCDay, day, Lazy
+from days._grid import Grid
+
+INTERSECTION = ord("+")
+CORNERS = b"/\\"
 
 
 class Cart:
@@ -72,42 +77,47 @@ class Cart:
     def turn(self):
         self.direction, self.next_corner = self.turn_results[self.direction][self.next_corner]
 
+    corner_results = {
+        "\\": {
+            Direction.RIGHT: Direction.DOWN,
+            Direction.UP: Direction.LEFT,
+            Direction.LEFT: Direction.UP,
+            Direction.DOWN: Direction.RIGHT,
+        },
+        "/": {
+            Direction.LEFT: Direction.DOWN,
+            Direction.UP: Direction.RIGHT,
+            Direction.DOWN: Direction.LEFT,
+            Direction.RIGHT: Direction.UP,
+        }
+    }
+
+    velocities = {
+        Direction.LEFT: (-1, 0),
+        Direction.RIGHT: (1, 0),
+        Direction.UP: (0, -1),
+        Direction.DOWN: (0, 1)
+    }
+
     def turn_corner(self, corner):
-        self.direction = {
-            "\\": {
-                Cart.Direction.RIGHT: Cart.Direction.DOWN,
-                Cart.Direction.UP: Cart.Direction.LEFT,
-                Cart.Direction.LEFT: Cart.Direction.UP,
-                Cart.Direction.DOWN: Cart.Direction.RIGHT,
-            },
-            "/": {
-                Cart.Direction.LEFT: Cart.Direction.DOWN,
-                Cart.Direction.UP: Cart.Direction.RIGHT,
-                Cart.Direction.DOWN: Cart.Direction.LEFT,
-                Cart.Direction.RIGHT: Cart.Direction.UP,
-            }
-        }[corner][self.direction]
+        self.direction = self.corner_results[corner][self.direction]
 
     def get_velocity(self):
-        return {
-            Cart.Direction.LEFT: (-1, 0),
-            Cart.Direction.RIGHT: (1, 0),
-            Cart.Direction.UP: (0, -1),
-            Cart.Direction.DOWN: (0, 1)
-        }[self.direction]
+        return self.velocities[self.direction]
 
-    def tick(self, track: List[List[str]], carts: List['Cart']) -> bool:
+    def tick(self, track: Grid, carts: List['Cart']) -> bool:
         delta_x, delta_y = self.get_velocity()
         new_x, new_y = (self.current_position[0] + delta_x), (self.current_position[1] + delta_y)
         collision = False
+        piece = track.cells[new_y * track.stride + new_x + track.offset]
 
         # If new piece of track is a +, turn.
-        if track[new_y][new_x] == "+":
+        if piece == INTERSECTION:
             self.turn()
 
         # If new piece of track is a corner, turn.
-        if track[new_y][new_x] in "/\\":
-            self.turn_corner(track[new_y][new_x])
+        if piece in CORNERS:
+            self.turn_corner(chr(piece))
 
         # If new piece of track is a cart, collision.
         if get_cart(carts, new_x, new_y) is not None:
@@ -131,7 +141,7 @@ class DayThirteen(AOCDay):
 | | |  | v  |
 \-+-/  \-+--/
   \------/   """
-    track: List[List[str]] = []
+    track: Grid = None
     carts: List[Cart] = []
 
     cart_to_line = {
@@ -141,19 +151,43 @@ class DayThirteen(AOCDay):
         "<": "-",
     }
 
+    scaling_sizes = [20, 40, 80, 160]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # A square loop of size x size, with an odd number of carts: one more going clockwise than going counter
+        # clockwise, so they crash in pairs until one cart is left. Carts start at least four places apart, so carts
+        # going the same way never run into each other.
+        length = 4 * (size - 1)
+
+        def place(i):
+            # Position on the loop (clockwise from the top left corner), and the cart going clockwise/counter clockwise
+            side, offset = divmod(i, size - 1)
+            return [((offset, 0), ">", "<"), ((size - 1, offset), "v", "^"),
+                    ((size - 1 - offset, size - 1), "<", ">"), ((0, size - 1 - offset), "^", "v")][side]
+
+        slots = [i for i in range(0, length, 4) if i % (size - 1) != 0]
+        carts = min(max(3, (size - 1) // 2), len(slots))
+        carts -= 1 - carts % 2
+        clockwise = carts // 2 + 1
+
+        grid = [["/"] + ["-"] * (size - 2) + ["\\"]]
+        grid += [["|"] + [" "] * (size - 2) + ["|"] for _ in range(size - 2)]
+        grid += [["\\"] + ["-"] * (size - 2) + ["/"]]
+        for n, i in enumerate(rng.sample(slots, carts)):
+            (x, y), forward, backward = place(i)
+            grid[y][x] = forward if n < clockwise else backward
+        return ["".join(row) for row in grid]
+
     def print_track(self):
-        result = ""
-        for y in range(len(self.track)):
-            for x in range(len(self.track[y])):
-                cart = get_cart(self.carts, x, y)
-                if cart is not None and len(cart) == 1:
-                    result += repr(cart[0])
-                elif cart is not None and len(cart) > 1:
-                    result += "X"
-                else:
-                    result += self.track[y][x]
-            result += "\n"
-        return result
+        rows = [list(row.decode("latin-1")) for row in self.track.rows()]
+        # Put the carts on the track, with an X where several of them are
+        carts = defaultdict(list)
+        for cart in self.carts:
+            carts[cart.current_position].append(cart)
+        for (x, y), here in carts.items():
+            rows[y][x] = repr(here[0]) if len(here) == 1 else "X"
+        return "".join("".join(row) + "\n" for row in rows)
 
     def sort_carts(self):
         coord_carts = [(cart.current_position, cart) for cart in self.carts]
@@ -162,32 +196,30 @@ class DayThirteen(AOCDay):
 
     def common(self, input_data):
         # input_data = self.test_input.split("\n")
-        self.track = []
+        self.track = Grid.from_lines(input_data)
         self.carts = []
         for y in range(len(input_data)):
-            self.track.append([])
             for x in range(len(input_data[y])):
-                self.track[-1].append(input_data[y][x])
                 if input_data[y][x] in [">", "v", "^", "<"]:
                     self.carts.append(Cart(Cart.Direction.from_char(input_data[y][x]), (x, y)))
-                    self.track[-1][-1] = self.cart_to_line[input_data[y][x]]
+                    self.track[x, y] = ord(self.cart_to_line[input_data[y][x]])
 
         yield self.carts
 
     def part1(self, input_data):
-        yield self.print_track()
+        yield Lazy(self.print_track)
         while True:
             sorted_carts = self.sort_carts()
             for c in sorted_carts:
                 collision = c.tick(self.track, self.carts)
                 if collision:
-                    yield self.print_track()
+                    yield Lazy(self.print_track)
                     yield "Collision on ({},{})!".format(c.current_position[0], c.current_position[1])
                     return
-            # yield self.print_track()
+            # yield Lazy(self.print_track)
 
     def part2(self, input_data):
-        yield self.print_track()
+        yield Lazy(self.print_track)
         while True:
             sorted_carts = self.sort_carts()
             for c in sorted_carts:
@@ -202,7 +234,7 @@ class DayThirteen(AOCDay):
                     if len(self.carts) <= 1:
                         c = self.carts[0]
                         c.tick(self.track, self.carts)
-                        yield self.print_track()
+                        yield Lazy(self.print_track)
                         yield "One cart left on position ({},{})!".format(c.current_position[0], c.current_position[1])
                         return
-            # yield self.print_track()
+            # yield Lazy(self.print_track)
@@ -17,6 +17,23 @@ class Recipe:
 @day(14)
 class DayFourteen(AOCDay):
     test_input = "59414"
+    scaling_sizes = [1000, 2000, 4000, 8000]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # Part 1 makes about size + 10 recipes, and part 2 looks for the digits of that number, so take the first
+        # number from size on whose digits show up on the scoreboard soon enough (some never do, like ones with 00)
+        scores, elf1, elf2 = [3, 7], 0, 1
+        while len(scores) < 20 * size + 100000:
+            scores.extend(int(x) for x in str(scores[elf1] + scores[elf2]))
+            elf1 = (elf1 + 1 + scores[elf1]) % len(scores)
+            elf2 = (elf2 + 1 + scores[elf2]) % len(scores)
+        scoreboard = "".join(map(str, scores))
+
+        number = size
+        while str(number) not in scoreboard:
+            number += 1
+        return [str(number)]
 
     first_recipe: Recipe = None
     last_recipe: Recipe = None
@@ -4,6 +4,16 @@ import time
 from typing import Tuple, List, Optional, Set
 
 from days import AOCDay, day
+from days._grid import Grid
+
+WALL = ord("#")
+EMPTY = ord(".")
+
+
+def surrounding(position: Tuple[int, int]) -> List[Tuple[int, int]]:
+    # In reading order
+    x, y = position
+    return [(x, y-1), (x-1, y), (x+1, y), (x, y+1)]
 
 
 class Field:
@@ -16,23 +26,7 @@ class Field:
         return " "
 
     def get_surrounding(self):
-        x, y = self.position
-        return [(x, y-1), (x-1, y), (x+1, y), (x, y+1)]
-
-
-class Wall(Field):
-    def __str__(self):
-        return "#"
-
-
-class Empty(Field):
-    def __str__(self):
-        return "."
-
-
-class Nothing(Field):
-    def __str__(self):
-        return " "
+        return surrounding(self.position)
 
 
 class Unit(Field):
@@ -61,13 +55,14 @@ class Unit(Field):
 
 
 class Board:
-    board: List[List[Field]]
+    board: Grid
     units: List[Unit]
     is_part_two: bool = False
     elf_has_died: bool = False
 
     def __init__(self, size_x: int, size_y: int):
-        self.board = [[None for _ in range(size_x)] for _ in range(size_y)]
+        # The characters of the map without the units, surrounded by walls
+        self.board = Grid(size_x, size_y, fill=ord(" "), border=WALL)
         self.units = []
         self.is_part_two = False
         self.elf_has_died = False
@@ -75,18 +70,18 @@ class Board:
     def __str__(self):
         res = ""
         occupied = {u.position: u for u in self.units if u.life > 0}
-        for y, line in enumerate(self.board):
+        for y in range(self.board.height):
             res += "{:3} ".format(y)
-            for field in line:
-                res += str(occupied[field.position]) if field.position in occupied else str(field)
+            for x in range(self.board.width):
+                res += str(occupied[(x, y)]) if (x, y) in occupied else chr(self.board[x, y])
             res += "  "
             for u in [x for x in self.units if x.position[1] == y and x.life > 0]:
                 res += " {}({:3}),".format(str(u), u.life)
             res += "\n"
         return res
 
-    def get(self, position: Tuple[int, int]) -> Field:
-        return self.board[position[1]][position[0]]
+    def is_wall(self, index: int) -> bool:
+        return self.board.cells[index] == WALL
 
     def start_combat(self) -> int:
         go_on = True
@@ -124,14 +119,16 @@ class Board:
         if not enemies:
             return False
 
-        # Identify places that we can go that are in range
-        occupied_coords = set(u.position for u in self.units if u.life > 0 and u != unit)
-        in_range_coords = set(coords for enemy in enemies for coords in enemy.get_surrounding()
-                              if not isinstance(self.get(coords), Wall) and coords not in occupied_coords)
+        # Identify places that we can go that are in range, as flat indices into the board
+        index = self.board.index
+        occupied = set(index(*u.position) for u in self.units if u.life > 0 and u != unit)
+        in_range = set(neighbor for enemy in enemies for neighbor in
+                       (index(*enemy.position) + offset for offset in self.board.offsets4)
+                       if not self.is_wall(neighbor) and neighbor not in occupied)
 
         # If we are not already in one of these positions, try to move to one of them.
-        if unit.position not in in_range_coords:
-            self.move_to_closest(unit, in_range_coords)
+        if index(*unit.position) not in in_range:
+            self.move_to_closest(unit, in_range)
 
         # See if we are next to an enemy so we can attack
         attack_opportunities = [e for e in enemies if e.position in unit.get_surrounding()]
@@ -144,44 +141,46 @@ class Board:
 
         return True
 
-    def move_to_closest(self, unit: Unit, coords: Set[Tuple[int, int]]):
-        # Dijkstra's algorithm
-        to_visit = collections.deque([(unit.position, 0)])  # Queue of coordinate, distance pairs
-        distances = {unit.position: (0, None)}
-        seen = set()
-        occupied = set(u.position for u in self.units if u.life > 0)  # All occupied coordinates
+    def move_to_closest(self, unit: Unit, targets: Set[int]):
+        # Dijkstra's algorithm, on flat indices into the board. Those are in reading order, so comparing them compares
+        # positions in reading order.
+        cells = self.board.cells
+        offsets = self.board.offsets4
+        start = self.board.index(*unit.position)
+        to_visit = collections.deque([(start, 0)])  # Queue of index, distance pairs
+        distances = {start: (0, None)}
+        queued = {start}  # Everything that is, or was, in to_visit
+        occupied = set(self.board.index(*u.position) for u in self.units if u.life > 0)  # All occupied indices
 
         # While we still have some spots left to visit
         while to_visit:
             position, distance = to_visit.popleft()
 
             # For all of the neighbors of this position
-            for neighbor in self.get(position).get_surrounding():
+            for offset in offsets:
+                neighbor = position + offset
                 # If this is a wall, or this is occupied, skip it.
-                if isinstance(self.get(neighbor), Wall) or neighbor in occupied:
+                if cells[neighbor] == WALL or neighbor in occupied:
                     continue
 
                 # If we have not seen this position before, or the distance to this is smaller than the distance that we
                 # already found, update the distance and 'via' values
-                if neighbor not in distances.keys() or (distances[neighbor][0], (distances[neighbor][1][1], distances[neighbor][1][0])) > (distance + 1, (position[1], position[0])):
+                if neighbor not in distances or distances[neighbor] > (distance + 1, position):
                     distances[neighbor] = (distance + 1, position)
 
                 # If we have not visited this neighbor yet, add it to the to_visit list if it is not in there yet.
-                if neighbor not in seen:
-                    if not any(neighbor == field[0] for field in to_visit):
-                        to_visit.append((neighbor, distance + 1))
-
-            # Mark the original position as seen
-            seen.add(position)
+                if neighbor not in queued:
+                    queued.add(neighbor)
+                    to_visit.append((neighbor, distance + 1))
 
         # See if we found a shortest path to one of our target coordinates,
         # and return the first one in reading order if we did, else return None
-        results = [(distance, position) for position, (distance, via) in distances.items() if position in coords]
+        results = [(distance, position) for position, (distance, via) in distances.items() if position in targets]
         if results:
-            d, closest = min(results, key=lambda x: (x[0], (x[1][1], x[1][0])))
+            d, closest = min(results)
             while distances[closest][0] > 1:
                 d, closest = distances[closest]
-            unit.position = closest
+            unit.position = self.board.position(closest)
 
 
 @day(15)
@@ -272,6 +271,35 @@ class DayTemplate(AOCDay):
     elf_atk: int = 3
     life: int = 200
 
+    scaling_sizes = [7, 10, 14, 20]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # A size x size cave with some rocks in it, and about as many elves as goblins. Open spaces that cannot be
+        # reached from the rest of the cave are filled in, so the units can always get to each other.
+        grid = [["#"] * size for _ in range(size)]
+        for y in range(1, size - 1):
+            for x in range(1, size - 1):
+                grid[y][x] = "#" if rng.random() < 0.15 else "."
+
+        open_spaces = [(x, y) for y in range(size) for x in range(size) if grid[y][x] == "."]
+        reachable = {rng.choice(open_spaces)}
+        to_visit = list(reachable)
+        while to_visit:
+            x, y = to_visit.pop()
+            for neighbour in [(x, y - 1), (x - 1, y), (x + 1, y), (x, y + 1)]:
+                if grid[neighbour[1]][neighbour[0]] == "." and neighbour not in reachable:
+                    reachable.add(neighbour)
+                    to_visit.append(neighbour)
+        for x, y in open_spaces:
+            if (x, y) not in reachable:
+                grid[y][x] = "#"
+
+        units = rng.sample(sorted(reachable), min(len(reachable), max(2, len(reachable) // 12)))
+        for i, (x, y) in enumerate(units):
+            grid[y][x] = "E" if i % 2 == 0 else "G"
+        return ["".join(row) for row in grid]
+
     def common(self, input_data):
         # input_data = self.test_input.split("\n")
         input_data = [list(x) for x in input_data]
@@ -280,19 +308,19 @@ class DayTemplate(AOCDay):
             for x in range(len(input_data[y])):
                 c = input_data[y][x]
                 if c == "#":
-                    thing = Wall((x, y))
+                    thing = WALL
                 elif c == ".":
-                    thing = Empty((x, y))
+                    thing = EMPTY
                 elif c == "G":
                     self.board.units.append(Unit(Unit.Type.GOBLIN, (x, y), self.life, self.gob_atk))
-                    thing = Empty((x, y))
+                    thing = EMPTY
                 elif c == "E":
                     self.board.units.append(Unit(Unit.Type.ELF, (x, y), self.life, self.elf_atk))
-                    thing = Empty((x, y))
+                    thing = EMPTY
                 else:
                     print("I don't know what a '{}' is".format(c))
-                    thing = Nothing((x, y))
-                self.board.board[y][x] = thing
+                    thing = ord(" ")
+                self.board.board[x, y] = thing
 
     def part1(self, input_data):
         yield "Combat ended with score {}".format(self.board.start_combat())
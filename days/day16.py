@@ -1,13 +1,187 @@
 import re
-from collections import defaultdict
-from typing import List, Tuple, Dict, Set
+from collections import defaultdict, deque
+from typing import Dict, Iterator, List, Set, Tuple
 
 from days import AOCDay, day
+from days._elfcode import OPCODE_NAMES, OPCODES, Machine
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 BEFORE_REGEX = r"Before:\s+\[(?P<r1>[0-9]+),\s+(?P<r2>[0-9]+),\s+(?P<r3>[0-9]+),\s+(?P<r4>[0-9]+)\]"
 OPCODE_REGEX = r"(?P<opcode>[0-9]+)\s+(?P<a>[0-9]+)\s+(?P<b>[0-9]+)\s+(?P<c>[0-3]+)"
 AFTER_REGEX = r"After:\s+\[(?P<r1>[0-9]+),\s+(?P<r2>[0-9]+),\s+(?P<r3>[0-9]+),\s+(?P<r4>[0-9]+)\]"
 
+
+def bits(mask: int) -> Iterator[int]:
+    # The positions of the bits that are set in mask, lowest first
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def describe(mask: int) -> str:
+    return "/".join(OPCODE_NAMES[i] for i in bits(mask))
+
+
+def propagate(masks: Dict[int, int]) -> Dict[int, int]:
+    """
+    Resolves the opcode numbers that can only be one opcode, and the opcodes that only one number can be, over and over
+    with a worklist: every number or opcode goes on it again only when one of its options goes away. Changes masks (the
+    opcodes every number can be, as a mask over OPCODE_NAMES) in place, and returns the resolved numbers with the index
+    of their opcode. Raises a ValueError if a number ends up without any opcode it can be.
+    """
+    resolved: Dict[int, int] = {}
+    # Which numbers can still be every opcode. Only if every opcode has a number, an opcode that one number can be
+    # has to be that number.
+    holders: Dict[int, Set[int]] = defaultdict(set)
+    for number, mask in masks.items():
+        for i in bits(mask):
+            holders[i].add(number)
+    every_opcode_used = len(masks) == len(OPCODE_NAMES)
+
+    numbers = deque(number for number, mask in masks.items() if mask & (mask - 1) == 0)
+    opcodes = deque(i for i, holding in holders.items() if len(holding) == 1) if every_opcode_used else deque()
+    while numbers or opcodes:
+        if numbers:
+            number = numbers.popleft()
+            if number in resolved:
+                continue
+            if not masks[number]:
+                raise ValueError("No opcode is left that number {} can be".format(number))
+            opcode = masks[number].bit_length() - 1
+        else:
+            opcode = opcodes.popleft()
+            if len(holders[opcode]) != 1 or next(iter(holders[opcode])) in resolved:
+                continue
+            number = next(iter(holders[opcode]))
+
+        resolved[number] = opcode
+        # The number is not any of its other opcodes...
+        for i in bits(masks[number] & ~(1 << opcode)):
+            holders[i].discard(number)
+            if len(holders[i]) == 1 and every_opcode_used:
+                opcodes.append(i)
+        masks[number] = 1 << opcode
+        # ...and no other number is this opcode
+        for other in holders[opcode] - {number}:
+            masks[other] &= ~(1 << opcode)
+            if masks[other] & (masks[other] - 1) == 0:
+                numbers.append(other)
+        holders[opcode] = {number}
+    return resolved
+
+
+def augment(number: int, masks: Dict[int, int], matched: Dict[int, int], owners: Dict[int, int],
+            seen: Set[int]) -> bool:
+    # Tries to give number an opcode by moving other numbers along an alternating path that avoids the opcodes in seen
+    for opcode in bits(masks[number]):
+        if opcode not in seen:
+            seen.add(opcode)
+            if opcode not in owners or augment(owners[opcode], masks, matched, owners, seen):
+                matched[number] = opcode
+                owners[opcode] = number
+                return True
+    return False
+
+
+def maximum_matching(masks: Dict[int, int]) -> Dict[int, int]:
+    """
+    Hopcroft-Karp: gives as many numbers as possible a different opcode (out of the opcodes in their mask), by
+    augmenting along a set of shortest paths at a time. Returns the opcode of every number that got one.
+    """
+    matched: Dict[int, int] = {}
+    owners: Dict[int, int] = {}
+    while True:
+        # Layer the numbers by the length of the shortest alternating path to them from a number without an opcode
+        layers = {number: 0 for number in masks if number not in matched}
+        queue = deque(layers)
+        free_opcode = False
+        while queue:
+            number = queue.popleft()
+            for opcode in bits(masks[number]):
+                owner = owners.get(opcode)
+                if owner is None:
+                    free_opcode = True
+                elif owner not in layers:
+                    layers[owner] = layers[number] + 1
+                    queue.append(owner)
+        if not free_opcode:
+            return matched
+
+        def shortest_augment(number: int) -> bool:
+            for opcode in bits(masks[number]):
+                owner = owners.get(opcode)
+                if owner is None or (layers.get(owner) == layers[number] + 1 and shortest_augment(owner)):
+                    matched[number] = opcode
+                    owners[opcode] = number
+                    return True
+            # Nothing to be found through here anymore in this round
+            layers[number] = None
+            return False
+
+        if not any([shortest_augment(number) for number in masks if number not in matched]):
+            return matched
+
+
+def resolve_opcodes(masks: Dict[int, int]) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """
+    Finds out which opcode every opcode number is, given the opcodes every number can be (as a mask over OPCODE_NAMES,
+    with the samples of every number already intersected). First propagates what can only be one way, and if that
+    leaves numbers open, finds out with bipartite matching which of their options fit a complete assignment.
+
+    Returns the numbers that can only be one opcode (with its index in OPCODE_NAMES), and the ones that the samples
+    cannot tell apart (with the mask of opcodes each of those can still be). Raises a ValueError if the samples
+    contradict each other, naming the numbers that cannot all be a different opcode.
+    """
+    masks = dict(masks)
+    resolved = propagate(masks)
+    masks = {number: mask for number, mask in masks.items() if number not in resolved}
+    if not masks:
+        return resolved, {}
+
+    matched = maximum_matching(masks)
+    owners = {opcode: number for number, opcode in matched.items()}
+    unmatched = [number for number in masks if number not in matched]
+    if unmatched:
+        # Everything the first number without an opcode can reach by alternating paths is a set of numbers with fewer
+        # opcodes between them than there are numbers
+        stuck, options, queue = {unmatched[0]}, 0, deque([unmatched[0]])
+        while queue:
+            options |= masks[queue.popleft()]
+            for opcode in bits(options):
+                if owners[opcode] not in stuck:
+                    stuck.add(owners[opcode])
+                    queue.append(owners[opcode])
+        raise ValueError("Numbers {} cannot all be a different one of {}".format(
+            ", ".join(map(str, sorted(stuck))), describe(options)))
+
+    # An option fits if the other numbers can still all get an opcode after this number takes it
+    ambiguous: Dict[int, int] = {}
+    for number, mask in masks.items():
+        fitting = 1 << matched[number]
+        for opcode in bits(mask & ~fitting):
+            trial_matched, trial_owners = dict(matched), dict(owners)
+            del trial_owners[matched[number]]
+            trial_matched[number] = opcode
+            trial_owners[opcode] = number
+            previous = owners.get(opcode)
+            if previous is None:
+                fitting |= 1 << opcode
+                continue
+            del trial_matched[previous]
+            if augment(previous, masks, trial_matched, trial_owners, {opcode}):
+                fitting |= 1 << opcode
+        if fitting & (fitting - 1):
+            ambiguous[number] = fitting
+        else:
+            resolved[number] = matched[number]
+    return resolved, ambiguous
+
+
 @day(16)
 class DayTemplate(AOCDay):
 
@@ -16,9 +190,28 @@ class DayTemplate(AOCDay):
 After:  [3, 2, 2, 1]""".split("\n")
 
     instructions: List[Tuple[List[int], List[int], List[int]]]
+    # For every sample, the opcodes it behaves like: bit i is set if it behaves like OPCODE_NAMES[i]
+    candidates: List[int] = []
     instruction_set = {}
     program: List[List[int]] = []
 
+    scaling_sizes = [200, 400, 800, 1600]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # size samples and a program of size instructions, for a random numbering of the opcodes
+        names = rng.sample(sorted(OPCODES), len(OPCODES))
+        lines = []
+        for _ in range(size):
+            before = [rng.randint(0, 3) for _ in range(4)]
+            opcode, a, b, c = rng.randrange(len(names)), rng.randint(0, 3), rng.randint(0, 3), rng.randint(0, 3)
+            after = OPCODES[names[opcode]](regs=before[:], a=a, b=b, c=c)
+            lines += ["Before: {}".format(before), "{} {} {} {}".format(opcode, a, b, c), "After:  {}".format(after), ""]
+        lines += ["", ""]
+        lines += ["{} {} {} {}".format(rng.randrange(len(names)), rng.randint(0, 3), rng.randint(0, 3),
+                                       rng.randint(0, 3)) for _ in range(size)]
+        return lines
+
     def common(self, input_data):
         # input_data = self.test_input
         self.instructions = []
@@ -48,153 +241,108 @@ After:  [3, 2, 2, 1]""".split("\n")
                 self.program.append(list(map(int, [instruction['opcode'], instruction['a'], instruction['b'], instruction['c']])))
                 i += 1
 
+        if numpy is not None and self.instructions:
+            self.candidates = self.identify_samples()
+        else:
+            self.candidates = [self.identify_instruction(*instruction) for instruction in self.instructions]
+
     def part1(self, input_data):
         above_three_count = 0
-        for instruction in self.instructions:
-            instr_id, count, instrs = self.identify_instruction(*instruction)
-            if count >= 3:
+        for mask in self.candidates:
+            if bin(mask).count("1") >= 3:
                 above_three_count += 1
         yield "{} samples behave like three or more opcodes.".format(above_three_count)
 
     def part2(self, input_data):
-        # Find all possible instructions for the given samples
-        possibilities: Dict[int, Set[str]] = defaultdict(set)
-        for instruction in self.instructions:
-            instr_id, count, instrs = self.identify_instruction(*instruction)
-            possibilities[instr_id].update(instrs)
+        # Find all possible instructions for the given samples: only the ones that every sample of an opcode behaves like
+        masks: Dict[int, int] = defaultdict(lambda: (1 << len(OPCODE_NAMES)) - 1)
+        for instruction, mask in zip(self.instructions, self.candidates):
+            masks[instruction[1][0]] &= mask
 
         # Identify instructions
-        while possibilities:
-            for op, options in possibilities.items():
-                if len(options) == 1:
-                    opcode, instruction = op, options.pop()
-                    yield "Identified {} as {}".format(opcode, instruction)
-                    break
-            else:
-                yield "Done?"
-                return
-
-            del possibilities[opcode]
-            for op in possibilities.keys():
-                try:
-                    possibilities[op].remove(instruction)
-                except KeyError:
-                    pass
-            self.instruction_set[opcode] = instruction
+        try:
+            resolved, ambiguous = resolve_opcodes(masks)
+        except ValueError as e:
+            yield "The samples contradict each other: {}".format(e)
+            return
+        for opcode, instruction in sorted(resolved.items()):
+            yield "Identified {} as {}".format(opcode, OPCODE_NAMES[instruction])
+            self.instruction_set[opcode] = OPCODE_NAMES[instruction]
+        unknown = sorted(set(op for op, _, _, _ in self.program) - set(masks))
+        if ambiguous or unknown:
+            for opcode, mask in sorted(ambiguous.items()):
+                yield "Cannot tell whether {} is {}".format(opcode, describe(mask))
+            if unknown:
+                yield "No samples of {}".format(", ".join(map(str, unknown)))
+            return
 
         yield "All instructions identified; running program..."
 
         # Execute program
-        registers = [0, 0, 0, 0]
-        for instr in self.program:
-            registers = self.execute_instruction(registers, instr)
-
-        yield "Register 0 has value {}".format(registers[0])
-
-    def identify_instruction(self, input_registers: List[int], instruction: List[int], output_registers: List[int]) -> Tuple[int, int, List[str]]:
-        count = 0
-        ops = []
-        for code, func in opcodes.items():
-            output: List[int] = func(regs=input_registers[:], a=instruction[1], b=instruction[2], c=instruction[3])
+        machine = Machine([(self.instruction_set[op], a, b, c) for op, a, b, c in self.program],
+                          registers=[0, 0, 0, 0])
+        machine.run()
+
+        yield "Register 0 has value {}".format(machine.registers[0])
+
+    def identify_instruction(self, input_registers: List[int], instruction: List[int], output_registers: List[int]) -> int:
+        # Returns the mask of opcodes the sample behaves like
+        mask = 0
+        for i, code in enumerate(OPCODE_NAMES):
+            try:
+                output: List[int] = OPCODES[code](regs=input_registers[:], a=instruction[1], b=instruction[2], c=instruction[3])
+            except IndexError:
+                # Uses a register that does not exist
+                continue
             if output == output_registers:
-                count += 1
-                ops.append(code)
-        return instruction[0], count, ops
-
-    def execute_instruction(self, input_registers: List[int], instruction: List[int]) -> List[int]:
-        return opcodes[self.instruction_set[instruction[0]]](
-            regs=input_registers[:], a=instruction[1], b=instruction[2], c=instruction[3]
-        )
-
-
-def get_r(registers: List[int], reg: int):
-    return registers[reg]
-
-
-def set_r(registers: List[int], reg: int, val: int) -> List[int]:
-    registers[reg] = val
-    return registers
-
-
-def addr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) + get_r(regs, b))
-
-
-def addi(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) + b)
-
-
-def mulr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) * get_r(regs, b))
-
-
-def muli(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) * b)
-
-
-def banr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) & get_r(regs, b))
-
-
-def bani(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) & b)
-
-
-def borr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) | get_r(regs, b))
-
-
-def bori(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) | b)
-
-
-def setr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a))
-
-
-def seti(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, a)
-
-
-def gtir(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if a > get_r(regs, b) else 0)
-
-
-def gtri(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if get_r(regs, a) > b else 0)
-
-
-def gtrr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if get_r(regs, a) > get_r(regs, b) else 0)
-
-
-def eqir(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if a == get_r(regs, b) else 0)
-
-
-def eqri(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if get_r(regs, a) == b else 0)
-
-
-def eqrr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if get_r(regs, a) == get_r(regs, b) else 0)
-
-
-opcodes = {
-    "addr": addr,
-    "addi": addi,
-    "mulr": mulr,
-    "muli": muli,
-    "banr": banr,
-    "bani": bani,
-    "borr": borr,
-    "bori": bori,
-    "setr": setr,
-    "seti": seti,
-    "gtir": gtir,
-    "gtri": gtri,
-    "gtrr": gtrr,
-    "eqir": eqir,
-    "eqri": eqri,
-    "eqrr": eqrr,
-}
+                mask |= 1 << i
+        return mask
+
+    def identify_samples(self) -> List[int]:
+        """
+        Does what identify_instruction() does for all samples at once with NumPy: every opcode is evaluated on the
+        columns of all samples together.
+        """
+        before = numpy.array([sample[0] for sample in self.instructions], dtype=numpy.int64)
+        instruction = numpy.array([sample[1] for sample in self.instructions], dtype=numpy.int64)
+        after = numpy.array([sample[2] for sample in self.instructions], dtype=numpy.int64)
+        rows = numpy.arange(len(before))
+        registers = before.shape[1]
+
+        a, b, c = instruction[:, 1], instruction[:, 2], instruction[:, 3]
+        # Operands that are not a register cannot be read as one
+        a_valid, b_valid, c_valid = a < registers, b < registers, c < registers
+        ra = before[rows, numpy.minimum(a, registers - 1)]
+        rb = before[rows, numpy.minimum(b, registers - 1)]
+
+        # All registers but c have to stay the same, and c has to get the value of the opcode
+        same = after == before
+        same[rows, numpy.minimum(c, registers - 1)] = True
+        possible = same.all(axis=1) & c_valid
+        target = after[rows, numpy.minimum(c, registers - 1)]
+
+        everything = numpy.ones(len(before), dtype=bool)
+        results = {
+            "addr": (ra + rb, a_valid & b_valid),
+            "addi": (ra + b, a_valid),
+            "mulr": (ra * rb, a_valid & b_valid),
+            "muli": (ra * b, a_valid),
+            "banr": (ra & rb, a_valid & b_valid),
+            "bani": (ra & b, a_valid),
+            "borr": (ra | rb, a_valid & b_valid),
+            "bori": (ra | b, a_valid),
+            "setr": (ra, a_valid),
+            "seti": (a, everything),
+            "gtir": (a > rb, b_valid),
+            "gtri": (ra > b, a_valid),
+            "gtrr": (ra > rb, a_valid & b_valid),
+            "eqir": (a == rb, b_valid),
+            "eqri": (ra == b, a_valid),
+            "eqrr": (ra == rb, a_valid & b_valid),
+        }
+
+        masks = numpy.zeros(len(before), dtype=numpy.int64)
+        for i, code in enumerate(OPCODE_NAMES):
+            value, valid = results[code]
+            masks |= ((value == target) & valid & possible).astype(numpy.int64) << i
+        return masks.tolist()
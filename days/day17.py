@@ -1,9 +1,8 @@
 import re
-from collections import defaultdict
 from enum import IntEnum
-from typing import Dict
 
 from days import AOCDay, day
+from days._grid import Grid
 
 
 PARSE_REGEX_1 = r'(?:x=(?P<x>[0-9]+), y=(?P<y1>[0-9]+)(?:..(?P<y2>[0-9]+))?)'
@@ -17,9 +16,6 @@ class Items(IntEnum):
     WATER = 3
     STATICWATER = 4
 
-    def is_water(self):
-        return self in [Items.WATER, Items.STATICWATER]
-
     @staticmethod
     def from_int(n):
         return {
@@ -31,6 +27,17 @@ class Items(IntEnum):
         }[n]
 
 
+WATER_ITEMS = frozenset((Items.WATER, Items.STATICWATER))
+
+
+STATIC_WATER_BYTE = bytes([Items.STATICWATER])
+FLOWING_WATER_BYTE = bytes([Items.WATER])
+
+
+def is_water(item):
+    return item in WATER_ITEMS
+
+
 @day(17)
 class DayTemplate(AOCDay):
     test_input = """x=495, y=2..7
@@ -42,23 +49,41 @@ x=498, y=10..13
 x=504, y=10..13
 y=13, x=498..504""".split("\n")
 
-    data: Dict[int, Dict[int, Items]] = defaultdict(lambda: defaultdict(lambda: Items.SAND))
+    data: Grid = None
     min_y = 0
     max_y = 0
     min_x = 0
     max_x = 0
+    scaling_sizes = [5, 10, 20, 40]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # size clay buckets (two walls and a bottom), each in its own cell of a grid below the spring, so they never
+        # touch each other
+        columns = max(2, int(size ** 0.5) * 2)
+        cells = rng.sample(range(columns * columns), size)
+        lines = []
+        for cell in cells:
+            column, row = cell % columns, cell // columns
+            left = 500 - columns * 10 + column * 20 + rng.randint(1, 4)
+            right = left + rng.randint(3, 14)
+            top = 2 + row * 15 + rng.randint(0, 3)
+            bottom = top + rng.randint(2, 10)
+            lines.append("x={}, y={}..{}".format(left, top, bottom))
+            lines.append("x={}, y={}..{}".format(right, top, bottom))
+            lines.append("y={}, x={}..{}".format(bottom, left, right))
+        return lines
 
     def print(self):
         result = ""
-        for y in range(self.min_y, self.max_y+1):
-            for x in range(self.min_x, self.max_x+1):
-                result += Items.from_int(self.data[y][x])
+        for row in self.data.rows():
+            result += "".join(Items.from_int(item) for item in row)
             result += "\n"
         return result
 
     def common(self, input_data):
         # input_data = self.test_input
-        data = defaultdict(lambda: defaultdict(int))
+        clay = []
         for line in input_data:
             m1 = re.match(PARSE_REGEX_1, line)
             m2 = re.match(PARSE_REGEX_2, line)
@@ -68,146 +93,140 @@ y=13, x=498..504""".split("\n")
                 y1 = int(grp['y1'])
                 y2 = int(grp['y2'])
                 for y in range(y1, y2+1):
-                    self.data[y][x] = Items.CLAY
+                    clay.append((x, y))
             elif m2:
                 grp = m2.groupdict()
                 y = int(grp['y'])
                 x1 = int(grp['x1'])
                 x2 = int(grp['x2'])
                 for x in range(x1, x2+1):
-                    self.data[y][x] = Items.CLAY
+                    clay.append((x, y))
             else:
                 yield "Error parsing line {}".format(line)
 
         # Water source
-        self.data[0][500] = Items.SOURCE
-
-        self.min_y = min(self.data.keys())
-        self.max_y = max(self.data.keys())
-        self.min_x = min([i for x in self.data.values() for i in x.keys()])
-        self.max_x = max([i for x in self.data.values() for i in x.keys()])
-
-    def in_range(self, x, y):
-        # return (self.min_x-1 < x < self.max_x+1) and (self.min_y-1 < y < self.max_y+1)
-        return self.min_y-1 < y < self.max_y+1
-
-    def onlywater(self, x, y):
+        source = (500, 0)
+
+        self.min_y = min(y for _, y in clay + [source])
+        self.max_y = max(y for _, y in clay + [source])
+        self.min_x = min(x for x, _ in clay + [source])
+        self.max_x = max(x for x, _ in clay + [source])
+
+        # Water can flow down just past the clay on either side. Everything around that (like the row below the
+        # bottom) is sand in the border of the grid.
+        self.data = Grid(self.max_x - self.min_x + 3, self.max_y - self.min_y + 1, fill=Items.SAND,
+                         x0=self.min_x - 1, y0=self.min_y)
+        for position in clay:
+            self.data[position] = Items.CLAY
+        self.data[source] = Items.SOURCE
+
+    def onlywater(self, i):
         # If the line below has either .~. #~. or .~#, return True
-        return (self.data[y+1][x-1] == Items.SAND or self.data[y+1][x+1] == Items.SAND) and self.data[y+1][x].is_water()
+        cells = self.data.cells
+        below = i + self.data.stride
+        return (cells[below-1] == Items.SAND or cells[below+1] == Items.SAND) and cells[below] in WATER_ITEMS
         #
         #
         # # If below this is only a line of water to the bottom, return True.
-        # if all(self.data[j][x] == Items.WATER for j in range(y+1, self.max_y+1)):
+        # if all(self.data[x, j] == Items.WATER for j in range(y+1, self.max_y+1)):
         #     return True
         # return False
 
-    def onlywater_x(self, x, y):
-        # If the line below x,y has only water until it reaches sand on either side, return True.
-        min_x = x
-        max_x = x
-        sand_min, sand_max = False, False
+    def onlywater_x(self, i):
+        # If the line below i has only water until it reaches sand on either side, return True. The cells
+        # between the first non-water on either side are all water, so only what stopped the search matters.
+        cells = self.data.cells
+        below = i + self.data.stride
+        x = self.data.position(i)[0]
         # Find sand to left
-        for i in range(x, self.min_x-1, -1):
-            if not self.data[y+1][i].is_water():
-                min_x = i
-                sand_min = self.data[y+1][i] == Items.SAND
+        for j in range(below, below - (x - self.min_x) - 1, -1):
+            if cells[j] not in WATER_ITEMS:
+                if cells[j] == Items.SAND:
+                    return True
                 break
-        min_x += 1  # Off-by-one to let the range below start at the correct x value for checking
         # Find sand to right
-        for i in range(x, self.max_x+1):
-            if not self.data[y+1][i].is_water():
-                max_x = i
-                sand_max = self.data[y+1][i] == Items.SAND
-                break
-        # Check if all water
-        if (sand_min or sand_max) and all(self.data[y+1][i].is_water() for i in range(min_x, max_x)):
-            return True
+        for j in range(below, below + (self.max_x - x) + 1):
+            if cells[j] not in WATER_ITEMS:
+                return cells[j] == Items.SAND
         return False
 
-    def convert_static_to_flowing(self, line):
-        if Items.WATER not in line.values() or Items.STATICWATER not in line.values():
+    def convert_static_to_flowing(self, y):
+        line = self.data.row(y)
+        if Items.WATER not in line or Items.STATICWATER not in line:
             return
 
-        start = 0
+        cells = self.data.cells
+        row_start = self.data.index(self.data.x0, y)
+        start = row_start
         has_flowing = False
-        for i in range(max(line.keys())+1):
-            if line[i] == Items.WATER:
+        for i in range(row_start, row_start + self.data.width):
+            if cells[i] == Items.WATER:
                 has_flowing = True
-                for j in range(start, i):
-                    if line[j] == Items.STATICWATER:
-                        line[j] = Items.WATER
-            elif line[i] == Items.STATICWATER:
+                cells[start:i] = cells[start:i].replace(STATIC_WATER_BYTE, FLOWING_WATER_BYTE)
+            elif cells[i] == Items.STATICWATER:
                 if has_flowing:
-                    line[i] = Items.WATER
+                    cells[i] = Items.WATER
             else:
                 start = i
                 has_flowing = False
 
     def simulate_water(self):
-        x, y = 500, 0
-        if self.data[y+1][x] != Items.SAND:
+        cells = self.data.cells
+        stride = self.data.stride
+        y = 0
+        i = self.data.index(500, y)
+        if cells[i+stride] != Items.SAND:
             raise ValueError("Water full")
 
         static = False
 
-        while self.in_range(x, y):
+        # y never goes above min_y, so only the bottom of the map needs checking
+        max_y = self.max_y
+        while y <= max_y:
             # Water moves down until it finds clay or water
-            if self.data[y+1][x] == Items.SAND:
-                while self.data[y+1][x] == Items.SAND and self.in_range(x, y+1):
+            if cells[i+stride] == Items.SAND:
+                while cells[i+stride] == Items.SAND and y < max_y:
+                    i += stride
                     y += 1
 
                 # If we reached the end of the map, stop
-                if not self.in_range(x, y+1):
+                if y >= max_y:
                     static = False
                     break
 
                 continue
 
             # If below this is only a horizontal line of water between wand, stop here.
-            if self.onlywater_x(x, y):
+            if self.onlywater_x(i):
                 static = False
                 break
 
             # If free space to the left and something below, move left
-            if self.data[y][x-1] == Items.SAND and self.data[y+1][x] != Items.SAND:
-                while self.data[y][x-1] == Items.SAND and self.data[y+1][x] != Items.SAND and self.in_range(x-1, y) and not self.onlywater(x, y):
-                    x -= 1
+            if cells[i-1] == Items.SAND:
+                while cells[i-1] == Items.SAND and cells[i+stride] != Items.SAND and not self.onlywater(i):
+                    i -= 1
 
                 # If we stopped because of a wall to the left, stop
-                if self.data[y][x-1] != Items.SAND:
-                    if self.data[y][x-1] == Items.WATER:
-                        static = False
-                    else:
-                        static = True
-                    break
-                # If we reached the end of the map, stop
-                if not self.in_range(x-1, y):
-                    static = False
+                if cells[i-1] != Items.SAND:
+                    static = cells[i-1] != Items.WATER
                     break
                 # If below this is only a line of water to the bottom, stop
-                if self.onlywater(x, y):
+                if self.onlywater(i):
                     static = False
                     break
                 continue
 
             # Else, if free space to the right and something below, move right
-            elif self.data[y][x+1] == Items.SAND and self.data[y+1][x] != Items.SAND:
-                while self.data[y][x+1] == Items.SAND and self.data[y+1][x] != Items.SAND and self.in_range(x+1, y) and not self.onlywater(x, y):
-                    x += 1
+            elif cells[i+1] == Items.SAND:
+                while cells[i+1] == Items.SAND and cells[i+stride] != Items.SAND and not self.onlywater(i):
+                    i += 1
 
                 # If we stopped because of a wall to the right, stop
-                if self.data[y][x+1] != Items.SAND:
-                    if self.data[y][x+1] == Items.WATER:
-                        static = False
-                    else:
-                        static = True
-                    break
-                # If we reached the end of the map, stop
-                if not self.in_range(x+1, y):
-                    static = False
+                if cells[i+1] != Items.SAND:
+                    static = cells[i+1] != Items.WATER
                     break
                 # If below this is only a line of water to the bottom, stop
-                if self.onlywater(x, y):
+                if self.onlywater(i):
                     static = False
                     break
                 continue
@@ -216,8 +235,8 @@ y=13, x=498..504""".split("\n")
             static = True
             break
 
-        self.data[y][x] = Items.STATICWATER if static else Items.WATER
-        print("x={},y={}".format(x, y))
+        cells[i] = Items.STATICWATER if static else Items.WATER
+        print("x={},y={}".format(*self.data.position(i)))
 
     def part1(self, input_data):
         try:
@@ -227,19 +246,12 @@ y=13, x=498..504""".split("\n")
                 # input("?")
         except ValueError:
             # Water connected to only other water and at least one flowing water should be flowing
-            for line in self.data.values():
-                self.convert_static_to_flowing(line)
-
-            self.min_y = min(self.data.keys())
-            self.max_y = max(self.data.keys())
-            self.min_x = min([i for x in self.data.values() for i in x.keys()])
-            self.max_x = max([i for x in self.data.values() for i in x.keys()])
+            for y in range(self.min_y, self.max_y+1):
+                self.convert_static_to_flowing(y)
 
             yield self.print()
-            s = sum([1 if x == Items.STATICWATER else 0 for row in self.data.values() for x in row.values()])
-            s -= sum([1 if x == Items.STATICWATER else 0 for x in self.data[max(self.data.keys())].values()])
-            f = sum([1 if x == Items.WATER else 0 for row in self.data.values() for x in row.values()])
-            f -= sum([1 if x == Items.WATER else 0 for x in self.data[max(self.data.keys())].values()])
+            s = self.data.count(Items.STATICWATER)
+            f = self.data.count(Items.WATER)
             yield "Water: {}".format(s)
             yield "Flowing: {}".format(f - 2)
             yield "Total: {}".format(s + f - 2)
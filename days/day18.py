@@ -1,28 +1,31 @@
-from collections import defaultdict
 from enum import IntEnum
 
 from days import AOCDay, day
+from days._cycles import CycleDetector
+from days._grid import Grid
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 
 class Field(IntEnum):
-    OPEN = 0
-    TREES = 1
-    LUMBER = 2
+    # The characters themselves, so the grid can be read and printed as is
+    OPEN = ord(".")
+    TREES = ord("|")
+    LUMBER = ord("#")
 
-    def to_str(self):
-        return {
-            Field.OPEN: ".",
-            Field.TREES: "|",
-            Field.LUMBER: "#"
-        }[self]
 
-    @staticmethod
-    def from_str(c):
-        return {
-            ".": Field.OPEN,
-            "|": Field.TREES,
-            "#": Field.LUMBER
-        }[c]
+def fingerprint(grid: Grid) -> bytes:
+    """
+    Returns the state of the grid packed into bytes: with NumPy two bits per acre (whether it has trees and whether it
+    is a lumberyard), and otherwise the cells themselves.
+    """
+    if numpy is None:
+        return bytes(grid.cells)
+    cells = grid.as_array()
+    return numpy.packbits(cells == Field.TREES.value).tobytes() + numpy.packbits(cells == Field.LUMBER.value).tobytes()
 
 
 @day(18)
@@ -40,21 +43,24 @@ class DayTemplate(AOCDay):
 
     data = []
 
-    histories = []
+    # How a generation is computed: "numpy" does all acres at once, "python" one at a time (also used without NumPy)
+    engine = "numpy"
+    # Every generation is a new grid, so the parts never change the one common() read
+    snapshot_mode = "share"
+    scaling_sizes = [10, 20, 40]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # A size x size area with open ground, trees and lumberyards in about the same mix as the real input
+        return ["".join(rng.choices(".|#", weights=[4, 3, 2], k=size)) for _ in range(size)]
 
     def print(self):
-        res = []
-        for line in self.data:
-            res.append("".join(x.to_str() for x in line))
-        return "\n".join(res)
+        return str(self.data)
 
     def common(self, input_data):
         # input_data = self.test_input
-        self.data = []
-        for line in input_data:
-            self.data.append([])
-            for c in line:
-                self.data[-1].append(Field.from_str(c))
+        # The border is neither of the fields, so the neighbours of every acre can be counted without bounds checks
+        self.data = Grid.from_lines(input_data, border=ord(" "))
 
     def part1(self, input_data):
         yield self.print()
@@ -70,22 +76,23 @@ class DayTemplate(AOCDay):
         )
 
     def part2(self, input_data):
-        i, index = 0, 0
+        target = 1000000000
         yield "Searching for pattern..."
-        for i in range(1000000000):
-            self.data = self.do_generation()
-
-            if self.data not in self.histories:
-                self.histories.append(self.data)
-            else:
-                index = self.histories.index(self.data)
-                yield "Found collision with {} on {} ({} cycles)".format(index, i, i-index)
+        # Only the counts of every generation are kept, to pick the ones the target ends up on out of the cycle
+        history = []
+        detector = CycleDetector(fingerprint)
+        for generation in range(target + 1):
+            cycle = detector.add(self.data)
+            if cycle is not None:
+                yield "Found collision with {} on {} ({} cycles)".format(cycle.start, cycle.end, cycle.length)
+                counts = history[cycle.extrapolate(target)[0]]
                 break
+            history.append(self.get_counts())
+            if generation < target:
+                self.data = self.do_generation()
+        else:
+            counts = history[-1]
 
-        offset = (1000000000 - index) % (i-index)
-        self.data = self.histories[index + offset - 1]
-
-        counts = self.get_counts()
         yield "{} trees, {} lumberyards, {}x{}={}".format(
             counts[Field.TREES], counts[Field.LUMBER],
             counts[Field.TREES], counts[Field.LUMBER],
@@ -93,37 +100,60 @@ class DayTemplate(AOCDay):
         )
 
     def do_generation(self):
-        output = [x[:] for x in self.data]  # Copy to create new generation
-
-        for y in range(len(output)):
-            for x in range(len(output[y])):
-                adj = self.adjacents(self.data, x, y)
-
-                # Open becomes trees if 3+ are trees
-                if output[y][x] == Field.OPEN and adj[Field.TREES] >= 3:
-                    output[y][x] = Field.TREES
-                # Trees becomes lumberyard if 3+ are lumberyard
-                elif output[y][x] == Field.TREES and adj[Field.LUMBER] >= 3:
-                    output[y][x] = Field.LUMBER
-                # Lumberyard changes to open if not adjacent to at least one lumberyard and one trees
-                elif output[y][x] == Field.LUMBER and (adj[Field.LUMBER] == 0 or adj[Field.TREES] == 0):
-                    output[y][x] = Field.OPEN
+        if self.engine == "numpy" and numpy is not None:
+            return self.do_generation_numpy()
+        return self.do_generation_python()
+
+    def do_generation_python(self):
+        cells = self.data.cells
+        output = self.data.copy()  # Copy to create new generation
+        new_cells = output.cells
+        offsets = self.data.offsets8
+        open_ground, trees, lumber = Field.OPEN.value, Field.TREES.value, Field.LUMBER.value
+
+        for i in self.data.indices():
+            field = cells[i]
+            adj = [cells[i + offset] for offset in offsets]
+
+            # Open becomes trees if 3+ are trees
+            if field == open_ground and adj.count(trees) >= 3:
+                new_cells[i] = trees
+            # Trees becomes lumberyard if 3+ are lumberyard
+            elif field == trees and adj.count(lumber) >= 3:
+                new_cells[i] = lumber
+            # Lumberyard changes to open if not adjacent to at least one lumberyard and one trees
+            elif field == lumber and (lumber not in adj or trees not in adj):
+                new_cells[i] = open_ground
 
         return output
 
-    def get_counts(self):
-        counts = defaultdict(int)
-        for y in range(len(self.data)):
-            for x in range(len(self.data[y])):
-                counts[self.data[y][x]] += 1
-        return counts
+    def do_generation_numpy(self):
+        """
+        Does the same as do_generation_python() on NumPy views of the grids: counts the trees and lumberyards around
+        every acre by adding up shifted arrays, and applies the rules with masks.
+        """
+        output = self.data.copy()
+        p, width, height = self.data.padding, self.data.width, self.data.height
+        # The acres with one acre of border around them, and the acres themselves
+        cells = self.data.as_array()[p - 1:p + height + 1, p - 1:p + width + 1]
+        field = cells[1:-1, 1:-1]
+        new_field = output.as_array()[p:p + height, p:p + width]
+
+        def neighbours(kind: int):
+            # How many of the 8 acres around every acre are of this kind: the sum of every 3x3 block, minus the middle
+            mask = (cells == kind).view(numpy.uint8)
+            rows = mask[:-2] + mask[1:-1] + mask[2:]
+            return rows[:, :-2] + rows[:, 1:-1] + rows[:, 2:] - mask[1:-1, 1:-1]
+
+        open_ground, trees, lumber = Field.OPEN.value, Field.TREES.value, Field.LUMBER.value
+        around_trees, around_lumber = neighbours(trees), neighbours(lumber)
+        # Open becomes trees if 3+ are trees
+        numpy.copyto(new_field, trees, where=(field == open_ground) & (around_trees >= 3))
+        # Trees becomes lumberyard if 3+ are lumberyard
+        numpy.copyto(new_field, lumber, where=(field == trees) & (around_lumber >= 3))
+        # Lumberyard changes to open if not adjacent to at least one lumberyard and one trees
+        numpy.copyto(new_field, open_ground, where=(field == lumber) & ((around_lumber == 0) | (around_trees == 0)))
+        return output
 
-    @staticmethod
-    def adjacents(field, x, y):
-        res = defaultdict(int)
-        for j in [-1, 0, 1]:
-            for i in [-1, 0, 1]:
-                if i != 0 or j != 0:
-                    if (0 <= y+j < len(field)) and (0 <= x+i < len(field[0])):
-                        res[field[y+j][x+i]] += 1
-        return res
+    def get_counts(self):
+        return {field: self.data.count(field) for field in Field}
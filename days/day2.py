@@ -1,3 +1,4 @@
+import string
 from collections import defaultdict
 
 from days import AOCDay, day
@@ -5,6 +6,18 @@ from days import AOCDay, day
 
 @day(2)
 class DayTwo(AOCDay):
+    scaling_sizes = [100, 200, 400, 800]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # size box IDs, of which exactly one pair differs in only one letter
+        ids = ["".join(rng.choice(string.ascii_lowercase) for _ in range(26)) for _ in range(size - 1)]
+        almost = list(rng.choice(ids))
+        i = rng.randrange(len(almost))
+        almost[i] = rng.choice(string.ascii_lowercase.replace(almost[i], ""))
+        ids.insert(rng.randrange(len(ids) + 1), "".join(almost))
+        return ids
+
     def common(self, input_data):
         pass
 
@@ -12,6 +12,30 @@ class DayTemplate(AOCDay):
     test_input_5 = "^WSSEESWWWNW(S|NENNEEEENN(ESSSSW(NWSW|SSEN)|WSWWN(E|WWS(E|SS))))$"
 
     grid: Dict[Tuple[int, int], int] = {(0, 0): 0}
+    # The parts only read the distances
+    snapshot_mode = "share"
+    scaling_sizes = [500, 1000, 2000, 4000]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # A route of about size doors, with branches (some of them detours that end where they started) nested at
+        # most 20 deep, to stay clear of the recursion limit of the parser
+
+        def route(length, depth):
+            parts, used = [], 0
+            while used < length:
+                if depth < 20 and length - used > 10 and rng.random() < 0.1:
+                    branch = rng.randint(2, min(40, (length - used) // 2))
+                    options = [route(branch, depth + 1) for _ in range(rng.randint(1, 2))]
+                    options.append("" if rng.random() < 0.3 else route(branch, depth + 1))
+                    parts.append("({})".format("|".join(options)))
+                    used += sum(len(option) for option in options)
+                else:
+                    parts.append(rng.choice("NESW"))
+                    used += 1
+            return "".join(parts)
+
+        return ["^{}$".format(route(size, 0))]
 
     def parse(self, iterator, position=(0, 0), distance=0):
         saved_position = position
@@ -1,176 +1,94 @@
-import re
-from collections import defaultdict
-from typing import List, Tuple, Dict, Set
+import itertools
+from typing import Iterator, List, Optional, Tuple
 
 from days import AOCDay, day
+from days._cycles import Cycle, CycleDetector, brent
+from days._elfcode import Instruction, Machine, find_register_check, parse_program
 
 
 @day(21)
 class DayTemplate(AOCDay):
-    program: List[Tuple[str, int, int, int]] = []
+    program: List[Instruction] = []
     pc_register: int = -1
-    pc = 0
+    # How part 2 finds the first repeated value: "set" keeps every value, "brent" runs the program a few times instead
+    cycle_detection = "set"
+    scaling_sizes = [256, 1024, 4096, 16384]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # The program of the real input with another seed and multiplier, that keeps the numbers it checks register
+        # 0 against below size (rounded up to a power of two) instead of below 2^24. The check stays at the same
+        # instruction, which both parts stop at.
+        mask = (1 << max(8, (size - 1).bit_length())) - 1
+        return [
+            "#ip 1",
+            "seti 123 0 5", "bani 5 456 5", "eqri 5 72 5", "addr 5 1 1", "seti 0 0 1", "seti 0 2 5",
+            "bori 5 65536 4", "seti {} 1 5".format(rng.randint(0, mask)), "bani 4 255 2", "addr 5 2 5",
+            "bani 5 {} 5".format(mask), "muli 5 {} 5".format(rng.randrange(65537, 131072, 2)),
+            "bani 5 {} 5".format(mask), "gtir 256 4 2", "addr 2 1 1", "addi 1 1 1", "seti 27 1 1", "seti 0 5 2",
+            "addi 2 1 3", "muli 3 256 3", "gtrr 3 4 3", "addr 3 1 1", "addi 1 1 1", "seti 25 0 1", "addi 2 1 2",
+            "seti 17 7 1", "setr 2 2 4", "seti 7 6 1", "eqrr 5 0 2", "addr 2 1 1", "seti 5 4 1",
+        ]
 
     def common(self, input_data):
-        self.program = []
-        self.pc = 0
-
-        self.pc_register = int(re.findall(r'\d+', input_data[0])[0]) if "#ip" in input_data[0] else -1
-
-        for line in input_data[1:]:
-            parts = line.split(" ")
-            self.program.append((
-                parts[0],
-                int(parts[1]),
-                int(parts[2]),
-                int(parts[3]),
-            ))
+        self.pc_register, self.program = parse_program(input_data)
 
     def part1(self, input_data):
-        # Execute program
-        registers = [0, 0, 0, 0, 0, 0]
-
-        try:
-            while True:
+        check = find_register_check(self.program, 0)
+        if check is None:
+            yield "The program never checks register 0"
+            return
+        pc, register = check
 
-                if self.pc == 29:
-                    yield "Value needed in register 0 for least instructions is {}".format(registers[5])
-                    return
+        # The program halts the first time register 0 is equal to the value it checks it against
+        machine = Machine(self.program, self.pc_register, [0, 0, 0, 0, 0, 0], compiled=True)
+        for value in machine.watch(pc, register):
+            yield "Value needed in register 0 for least instructions is {}".format(value)
+            return
+        yield "Terminated."
 
-                instr = self.program[self.pc]
-                registers = self.execute_instruction(registers, instr)
-        except IndexError:
-            yield "Terminated."
-
-        yield "Register 0 has value {}".format(registers[0])
+        yield "Register 0 has value {}".format(machine.registers[0])
 
     def part2(self, input_data):
-        # Execute program
-        registers = [0, 0, 0, 0, 0, 0]
-        detected = []
-        previous = 0
+        check = find_register_check(self.program, 0)
+        if check is None:
+            yield "The program never checks register 0"
+            return
+        pc, register = check
 
-        try:
-            while True:
-                if self.pc == 29:
-                    yield registers[5], previous, len(detected)
-                    if registers[5] in detected:
-                        yield "Value needed in register 0 for most instructions is {}".format(previous)
-                        return
-                    previous = registers[5]
-                    detected.append(previous)
+        # The values the program checks register 0 against repeat at some point, and the last one before the first
+        # repeat makes it run for the longest. Every value only depends on the one before it.
+        cycle, first, last = self.find_cycle(pc, register)
 
-                instr = self.program[self.pc]
-                registers = self.execute_instruction(registers, instr)
-        except IndexError:
+        if cycle is None:
             yield "Terminated."
-
-        yield "Register 0 has value {}".format(registers[0])
-
-    def execute_instruction(self, input_registers: List[int], instruction: Tuple[str, int, int, int]) -> List[int]:
-        if self.pc_register >= 0:
-            input_registers[self.pc_register] = self.pc
-
-        res = opcodes[instruction[0]](
-            regs=input_registers[:], a=instruction[1], b=instruction[2], c=instruction[3]
-        )
-
-        # print("ip={} {} {} {}".format(self.pc, input_registers, instruction, res))
-
-        if self.pc_register >= 0:
-            self.pc = res[self.pc_register]
-        self.pc += 1
-        return res
-
-
-def get_r(registers: List[int], reg: int):
-    return registers[reg]
-
-
-def set_r(registers: List[int], reg: int, val: int) -> List[int]:
-    registers[reg] = val
-    return registers
-
-
-def addr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) + get_r(regs, b))
-
-
-def addi(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) + b)
-
-
-def mulr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) * get_r(regs, b))
-
-
-def muli(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) * b)
-
-
-def banr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) & get_r(regs, b))
-
-
-def bani(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) & b)
-
-
-def borr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) | get_r(regs, b))
-
-
-def bori(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a) | b)
-
-
-def setr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, get_r(regs, a))
-
-
-def seti(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, a)
-
-
-def gtir(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if a > get_r(regs, b) else 0)
-
-
-def gtri(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if get_r(regs, a) > b else 0)
-
-
-def gtrr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if get_r(regs, a) > get_r(regs, b) else 0)
-
-
-def eqir(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if a == get_r(regs, b) else 0)
-
-
-def eqri(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if get_r(regs, a) == b else 0)
-
-
-def eqrr(regs: List[int], a: int, b: int, c: int) -> List[int]:
-    return set_r(regs, c, 1 if get_r(regs, a) == get_r(regs, b) else 0)
-
-
-opcodes = {
-    "addr": addr,
-    "addi": addi,
-    "mulr": mulr,
-    "muli": muli,
-    "banr": banr,
-    "bani": bani,
-    "borr": borr,
-    "bori": bori,
-    "setr": setr,
-    "seti": seti,
-    "gtir": gtir,
-    "gtri": gtri,
-    "gtrr": gtrr,
-    "eqir": eqir,
-    "eqri": eqri,
-    "eqrr": eqrr,
-}
+            return
+        yield "First value is {}, last of the {} unique values is {}".format(first, cycle.end, last)
+        yield "Value needed in register 0 for most instructions is {}".format(last)
+
+    def values(self, pc: int, register: int) -> Iterator[int]:
+        return Machine(self.program, self.pc_register, [0, 0, 0, 0, 0, 0], compiled=True).watch(pc, register)
+
+    def find_cycle(self, pc: int, register: int) -> Tuple[Optional[Cycle], Optional[int], Optional[int]]:
+        """
+        Returns the cycle of the values, the first value, and the last value before the first one that was seen before.
+        With cycle_detection "brent" it does not keep the values it has seen, but runs the program about four times as
+        long.
+        """
+        if self.cycle_detection == "brent":
+            cycle = brent(lambda: self.values(pc, register))
+            first = next(self.values(pc, register), None)
+            if cycle is None:
+                return None, first, None
+            return cycle, first, next(itertools.islice(self.values(pc, register), cycle.end - 1, None))
+
+        detector = CycleDetector()
+        first, last = None, None
+        for value in self.values(pc, register):
+            cycle = detector.add(value)
+            if cycle is not None:
+                return cycle, first, last
+            if first is None:
+                first = value
+            last = value
+        return None, first, None
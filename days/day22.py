@@ -13,6 +13,12 @@ target: 10,10""".split("\n")
 
     depth: int = 0
     coordinates: List[int] = []
+    scaling_sizes = [50, 100, 200, 400]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # A target size deep, and (like in the real input) much closer to the left
+        return ["depth: {}".format(rng.randint(3000, 12000)), "target: {},{}".format(max(1, size // 10), size)]
 
     @lru_cache(maxsize=None)
     def geological_index(self, x, y):
@@ -24,6 +24,14 @@ pos=<10,10,10>, r=5"""
 
     bots = {}
     BOTS_RE = re.compile('pos=<(?P<x>[-0-9]+),(?P<y>[-0-9]+),(?P<z>[-0-9]+)>, r=(?P<r>[-0-9]+)')
+    scaling_sizes = [250, 500, 1000, 2000]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # size nanobots, spread and sized like the ones in the real input
+        return ["pos=<{},{},{}>, r={}".format(rng.randint(-60000000, 60000000), rng.randint(-60000000, 60000000),
+                                             rng.randint(-60000000, 60000000), rng.randint(40000000, 100000000))
+                for _ in range(size)]
 
     def manhattan_distance(self, source, target):
         return abs(source[0] - target[0]) + abs(source[1] - target[1]) + abs(source[2] - target[2])
@@ -40,6 +48,7 @@ pos=<10,10,10>, r=5"""
 
     def common(self, input_data):
         # input_data = self.test_input2.split("\n")
+        self.bots = {}
         for line in input_data:
             rx = self.BOTS_RE.match(line)
             x, y, z, r = int(rx.group('x')), int(rx.group('y')), int(rx.group('z')), int(rx.group('r'))
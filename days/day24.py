@@ -101,6 +101,36 @@ Infection:
 
     immune_system_groups = []
     infection_groups = []
+    scaling_sizes = [5, 10, 20, 40]
+
+    ATTACK_TYPES = ["bludgeoning", "cold", "fire", "radiation", "slashing"]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # size groups per army. No infection group is immune to the attack of the first immune system group, so a
+        # large enough boost always wins part 2.
+        initiatives = rng.sample(range(1, 2 * size + 1), 2 * size)
+        lines = []
+        for army in ["Immune System", "Infection"]:
+            if lines:
+                lines.append("")
+            lines.append("{}:".format(army))
+            for i in range(size):
+                attack_type = DayTemplate.ATTACK_TYPES[i % len(DayTemplate.ATTACK_TYPES)]
+                modifiers = rng.sample(DayTemplate.ATTACK_TYPES, rng.randint(0, 4))
+                if army == "Infection":
+                    modifiers = [x for x in modifiers if x != DayTemplate.ATTACK_TYPES[0]]
+                immunities, weaknesses = modifiers[:len(modifiers) // 2], modifiers[len(modifiers) // 2:]
+                specials = []
+                if immunities:
+                    specials.append("immune to {}".format(", ".join(immunities)))
+                if weaknesses:
+                    specials.append("weak to {}".format(", ".join(weaknesses)))
+                lines.append("{} units each with {} hit points{} with an attack that does {} {} damage at "
+                             "initiative {}".format(rng.randint(500, 5000), rng.randint(1000, 20000),
+                                                    " ({})".format("; ".join(specials)) if specials else "",
+                                                    rng.randint(5, 50), attack_type, initiatives.pop()))
+        return lines
 
     def reset(self):
         self.immune_system_groups = []
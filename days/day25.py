@@ -5,6 +5,8 @@ from days import AOCDay, day
 
 @day(25)
 class DayTemplate(AOCDay):
+    input_mode = "iter"
+
     test_input = """0,0,0,0
 3,0,0,0
 0,3,0,0
@@ -48,6 +50,15 @@ class DayTemplate(AOCDay):
     points = []
     graph = defaultdict(list)
     points_by_x_coord = defaultdict(list)
+    # The parts only read the points
+    snapshot_mode = "share"
+    scaling_sizes = [250, 500, 1000, 2000]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # size points, about as densely packed as in the real input
+        spread = max(3, round((size * 5) ** 0.25))
+        return [",".join(str(rng.randint(-spread, spread)) for _ in range(4)) for _ in range(size)]
 
     def manhattan_distance(self, x, y):
         return sum(abs(xi - yi) for xi, yi in zip(x, y))
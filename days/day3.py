@@ -9,6 +9,17 @@ class DayThree(AOCDay):
 
     PARSE_REGEX = r'#([0-9]+) @ ([0-9]+),([0-9]+): ([0-9]+)x([0-9]+)'
     parsed_input = []
+    # The parts only read the claims
+    snapshot_mode = "share"
+    scaling_sizes = [250, 500, 1000, 2000]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # size claims on the fabric, the last of which is in a corner that no other claim reaches (for part 2)
+        lines = ["#{} @ {},{}: {}x{}".format(i, rng.randint(0, 900), rng.randint(0, 900), rng.randint(10, 29),
+                                             rng.randint(10, 29)) for i in range(1, size)]
+        lines.append("#{} @ 950,950: 20x20".format(size))
+        return lines
 
     def common(self, input_data):
         self.parsed_input = []
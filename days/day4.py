@@ -1,3 +1,4 @@
+import datetime
 import re
 from collections import defaultdict
 
@@ -30,6 +31,29 @@ class DayFour(AOCDay):
 [1518-11-05 00:45] falls asleep
 [1518-11-05 00:55] wakes up"""
 
+    scaling_sizes = [100, 200, 400, 800]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # The records of size nights, shuffled like the real input. Every guard starts just before midnight, and
+        # sleeps at least once.
+        guards = rng.sample(range(10, 4000), max(1, size // 20))
+        lines = []
+        for night in range(size):
+            date = datetime.date(1518, 1, 1) + datetime.timedelta(days=night)
+            previous = date - datetime.timedelta(days=1)
+            lines.append("[{:04d}-{:02d}-{:02d} 23:{}] Guard #{} begins shift".format(
+                previous.year, previous.month, previous.day, rng.randint(50, 59), rng.choice(guards)
+            ))
+            minutes = sorted(rng.sample(range(1, 60), 2 * rng.randint(1, 3)))
+            for asleep, awake in zip(minutes[::2], minutes[1::2]):
+                lines.append("[{:04d}-{:02d}-{:02d} 00:{:02d}] falls asleep".format(date.year, date.month, date.day,
+                                                                                   asleep))
+                lines.append("[{:04d}-{:02d}-{:02d} 00:{:02d}] wakes up".format(date.year, date.month, date.day,
+                                                                               awake))
+        rng.shuffle(lines)
+        return lines
+
     def common(self, input_data):
         # input_data = self.test_data.split("\n")
         input_data = sorted(input_data)
@@ -1,10 +1,26 @@
-from days import AOCDay, day
+import string
+
+from days import AOCDay, day, Lazy
 
 
 @day(5)
 class DayFive(AOCDay):
 
     test_input = "dabAcCaCBAcCcaDA"
+    scaling_sizes = [250, 500, 1000, 2000]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # A polymer of size units. Units often close the last unit that was not closed yet, so (like in the real input)
+        # most of the polymer reacts away.
+        units, unclosed = [], []
+        while len(units) < size:
+            if unclosed and rng.random() < 0.45:
+                units.append(unclosed.pop().swapcase())
+            else:
+                units.append(rng.choice(string.ascii_letters))
+                unclosed.append(units[-1])
+        return ["".join(units)]
 
     @staticmethod
     def check_one_step(inp):
@@ -45,7 +61,7 @@ class DayFive(AOCDay):
     def part2(self, input_data):
         results = {}
         for c in "abcdefghijklmnopqrstuvwxyz":
-            yield "Processing {}...".format(c)
+            yield Lazy("Processing {}...", c)
             current_input = list(DayFive.remove_all(input_data, c))
 
             old = None
@@ -53,7 +69,7 @@ class DayFive(AOCDay):
             while old != new:
                 old, new = DayFive.check_one_step(new)
             results[c] = len(new)
-            yield "{} results in {} characters.".format(c, len(new))
+            yield Lazy("{} results in {} characters.", c, len(new))
 
         shortest = min(results.items(), key=lambda x: x[1])
         yield "Removing {} leads to the shortest reactant, at {} long.".format(shortest[0], shortest[1])
@@ -1,12 +1,17 @@
 from collections import defaultdict
 
 from days import AOCDay, day
+from days._grid import Grid
+
+# What a cell of the grid holds when it is not (yet) the closest to a single coordinate
+UNCLAIMED = 254
+TIED = 255
 
 
 @day(6)
 class DaySix(AOCDay):
     coords = {}
-    grid = []
+    grid: Grid = None
     test_input = """1, 1
 1, 6
 8, 3
@@ -19,9 +24,17 @@ class DaySix(AOCDay):
     # max = 32
     max = 10000
 
+    scaling_sizes = [25, 50, 100, 200]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # 50 coordinates (more than the letters in chars cannot be shown) spread over a size x size area
+        return ["{}, {}".format(i % size, i // size) for i in rng.sample(range(size * size), 50)]
+
     def common(self, input_data):
         # input_data = self.test_input.split("\n")
 
+        self.coords = {}
         character = 0
         for line in input_data:
             coords = line.split(", ")
@@ -31,17 +44,13 @@ class DaySix(AOCDay):
         max_x = max(self.coords.values(), key=lambda i: i[0])[0] + 2
         max_y = max(self.coords.values(), key=lambda i: i[1])[1] + 2
         yield "Grid is of size {} x {}".format(max_x, max_y)
-        self.grid = []
-
-        for x in range(max_y):
-            self.grid.append([])
-            for y in range(max_x):
-                self.grid[-1].append("_")
+        # Cells hold the number of the coordinate that is closest to them
+        self.grid = Grid(max_x, max_y, fill=UNCLAIMED, padding=0)
 
         for character, coords in self.coords.items():
-            self.grid[coords[1]][coords[0]] = character
+            self.grid[coords] = character
 
-        # yield "\n".join(["".join([self.chars[x] for x in row]) for row in self.grid])
+        # yield "\n".join(["".join([self.chars[x] for x in row]) for row in self.grid.rows()])
 
     @staticmethod
     def manhattan_distance(current, center):
@@ -50,74 +59,46 @@ class DaySix(AOCDay):
         return dx + dy
 
     def part1(self, input_data):
-        for y in range(len(self.grid)):
-            for x in range(len(self.grid[y])):
+        cells = self.grid.cells
+        for y, start in enumerate(self.grid.row_starts()):
+            for x, i in enumerate(range(start, start + self.grid.width)):
                 distances = defaultdict(list)
                 for character, coord in self.coords.items():
                     distances[DaySix.manhattan_distance((x, y), coord)].append(character)
                 min_dist = min(distances.items(), key=lambda d: d[0])
                 # yield "{} has minimum distance to {} ({})".format((x, y), min_dist[1], min_dist[0])
                 if len(min_dist[1]) == 1:
-                    if self.grid[y][x] != min_dist[1][0]:
-                        self.grid[y][x] = min_dist[1][0]
+                    cells[i] = min_dist[1][0]
                 else:
-                    self.grid[y][x] = "."
+                    cells[i] = TIED
 
-        # yield "\n".join(["".join([self.chars[x] if x != "." else "." for x in row]) for row in self.grid])
+        # yield "\n".join(["".join([self.chars[x] if x != TIED else "." for x in row]) for row in self.grid.rows()])
 
         # Filter out letters that are on the sides of the grid, as those are infinite
-        letter_candidates = []
-        for i in list(range(len(self.coords))):
-            valid = True
-            # First row
-            for grid in self.grid[0]:
-                if grid == i:
-                    valid = False
-                    break
-            if valid:
-                # First column
-                for grid in [x[0] for x in self.grid]:
-                    if grid == i:
-                        valid = False
-                        break
-            if valid:
-                # Last row
-                for grid in self.grid[-1]:
-                    if grid == i:
-                        valid = False
-                        break
-            if valid:
-                # Last column
-                for grid in [x[-1] for x in self.grid]:
-                    if grid == i:
-                        valid = False
-                        break
-
-            if valid:
-                letter_candidates.append(i)
+        sides = (self.grid.row(0) + self.grid.column(0) + self.grid.row(self.grid.height - 1) +
+                 self.grid.column(self.grid.width - 1))
+        letter_candidates = [i for i in range(len(self.coords)) if i not in sides]
 
         yield "Letter candidates: {}".format([self.chars[i] for i in letter_candidates])
 
-        sizes = defaultdict(int)
-        for y in self.grid:
-            for x in y:
-                if x in letter_candidates:
-                    sizes[x] += 1
+        sizes = {i: self.grid.count(i) for i in letter_candidates}
 
         max_size = max(sizes.items(), key=lambda x: x[1])
         yield "The largest field is {} with {} tiles".format(self.chars[max_size[0]], max_size[1])
 
     def part2(self, input_data):
-        for y in range(len(self.grid)):
-            for x in range(len(self.grid[y])):
-                self.grid[y][x] = "#" if sum([DaySix.manhattan_distance((x, y), c) for _, c in self.coords.items()]) < self.max else "."
-
-        # yield "\n".join(["".join(row) for row in self.grid])
-
-        size = 0
-        for y in self.grid:
-            for x in y:
-                if x == "#":
-                    size += 1
+        safe, unsafe = ord("#"), ord(".")
+        # The total distance is the sum of the distances along x plus the sum of the distances along y, so both sums
+        # only have to be computed once per column and once per row
+        x_distances = [sum(abs(x - c[0]) for c in self.coords.values()) for x in range(self.grid.width)]
+        y_distances = [sum(abs(y - c[1]) for c in self.coords.values()) for y in range(self.grid.height)]
+        cells = self.grid.cells
+        for start, y_distance in zip(self.grid.row_starts(), y_distances):
+            cells[start:start + self.grid.width] = bytes(safe if x_distance + y_distance < self.max else unsafe
+                                                         for x_distance in x_distances)
+
+        # yield str(self.grid)
+
+        size = self.grid.count(safe)
 
         yield "The safe field is {} tiles large".format(size)
@@ -1,4 +1,6 @@
+import copy
 import re
+import string
 from typing import List, Dict
 
 from days import AOCDay, day
@@ -43,6 +45,10 @@ class Node:
     def reset(cls):
         cls._instances = {}
 
+    @classmethod
+    def set_all(cls, instances: Dict[str, 'Node']):
+        cls._instances = instances
+
     @classmethod
     def get_initial(cls):
         return [x for x in cls._instances.values() if not x.parents]
@@ -103,6 +109,17 @@ Step B must be finished before step E can begin.
 Step D must be finished before step E can begin.
 Step F must be finished before step E can begin."""
     regex = r'Step ([A-Z]) must be finished before step ([A-Z]) can begin.'
+    scaling_sizes = [25, 50, 100, 200]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # Steps are single letters, so this is always a graph of 26 steps, with size dependencies between them (at
+        # most 325, when every step depends on all steps before it). The dependencies follow a random order of the
+        # steps, so there are no cycles.
+        order = rng.sample(string.ascii_uppercase, len(string.ascii_uppercase))
+        pairs = [(order[i], order[j]) for i in range(len(order)) for j in range(i + 1, len(order))]
+        return ["Step {} must be finished before step {} can begin.".format(parent, child)
+                for parent, child in rng.sample(pairs, min(size, len(pairs)))]
 
     def common(self, input_data):
         Node.reset()
@@ -118,6 +135,13 @@ Step F must be finished before step E can begin."""
         # for name, node in Node.get_all().items():
         #     yield str(node)
 
+    def snapshot(self, budget=None):
+        # The graph lives in the Node registry instead of on this instance, and part 1 takes it apart.
+        return copy.deepcopy(Node.get_all())
+
+    def restore(self, state):
+        Node.set_all(state)
+
     def part1(self, input_data):
         """
         https://en.wikipedia.org/wiki/Topological_sorting#Kahn's_algorithm
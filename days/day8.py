@@ -49,6 +49,29 @@ class DayEight(AOCDay):
     test_input = "2 3 0 3 10 11 12 1 1 0 1 99 2 1 1 2"
     current_identifier = "A"
     root_node = None
+    scaling_sizes = [500, 1000, 2000, 4000]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # A tree of size nodes. Every node hangs under a random earlier node, which keeps the tree shallow enough for
+        # the recursive parser.
+        children = [[] for _ in range(size)]
+        for node in range(1, size):
+            children[rng.randrange(node)].append(node)
+        metadata = [[rng.randint(1, len(children[node]) + 1 if children[node] else 9)
+                     for _ in range(rng.randint(1, 3))] for node in range(size)]
+
+        numbers = []
+        stack = [(0, False)]
+        while stack:
+            node, done = stack.pop()
+            if done:
+                numbers.extend(metadata[node])
+                continue
+            numbers.extend([len(children[node]), len(metadata[node])])
+            stack.append((node, True))
+            stack.extend((child, False) for child in reversed(children[node]))
+        return [" ".join(map(str, numbers))]
 
     def parse_node(self, input_data: List[int]) -> Tuple[Node, int]:
         i = 0
@@ -20,6 +20,12 @@ class Entry:
 class DayNine(AOCDay):
     test_input = "9 players; last marble is worth 25 points"
     input_regex = r'([0-9]+) players; last marble is worth ([0-9]+) points'
+    scaling_sizes = [1000, 2000, 4000, 8000]
+
+    @staticmethod
+    def generate_input(size, rng):
+        # The last marble is worth size points (and part 2 plays 100 times as many marbles)
+        return ["{} players; last marble is worth {} points".format(rng.randint(10, 500), size)]
 
     num_players: int = None
     num_marbles: int = None
@@ -1,22 +1,71 @@
+import argparse
 import datetime
+import importlib
 import json
+import os
 import shutil
 import sys
-import traceback
-import os
+
+# Other modes of run.py, and the module whose main(args, settings) implements them
+COMMANDS = {
+    "bench": "aocbench",
+    "profile": "aocprofile",
+    "prefetch": "aocfetch",
+    "verify": "aocverify",
+    "scaling": "aocscaling",
+    "shootout": "aocshootout",
+}
+
+
+def load_settings():
+    if os.path.isfile("settings.json"):
+        with open("settings.json", 'r') as s:
+            return json.loads("".join(s.readlines()))
+    else:
+        shutil.copy("settings.json.default", "settings.json")
+        print("Please fill in settings.json first!")
+        sys.exit(3)
+
 
 if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] in COMMANDS:
+        command = importlib.import_module(COMMANDS[sys.argv[1]])
+        sys.exit(command.main(sys.argv[2:], load_settings()))
+
+    parser = argparse.ArgumentParser(
+        description="Runs a given AoC day (or the current day if no arguments are given)"
+    )
+    parser.add_argument("day", nargs="?", default=None, help="day number to run, or 'all' to run every day")
+    parser.add_argument("create", nargs="?", choices=["create"], metavar="create",
+                        help="create the files for the day if missing")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of days to run at the same time in separate processes")
+    parser.add_argument("--parse-cache", action="store_true",
+                        help="cache the parsed input of every day on disk, and reuse it while the input and the day "
+                             "are unchanged")
+    parser.add_argument("--budget", type=float, default=None,
+                        help="time budget per part in seconds; parts run in a separate process that is killed when "
+                             "it runs out of time")
+    parser.add_argument("-f", "--force", action="store_true",
+                        help="recompute every day, even if its input and solution did not change since it last ran")
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument("-q", "--quiet", action="store_const", dest="verbosity", const="quiet",
+                           help="only output the final answer of every part")
+    verbosity.add_argument("--file-only", action="store_const", dest="verbosity", const="file",
+                           help="only write the output to the output files, not to the console")
+    parser.set_defaults(verbosity="normal")
+    args = parser.parse_args()
+
     run_everything = False
-    if len(sys.argv) >= 2:
+    if args.day is not None:
         try:
-            if sys.argv[1] == "all":
+            if args.day == "all":
                 run_everything = True
                 day_number = 1
             else:
-                day_number = int(sys.argv[1])
+                day_number = int(args.day)
         except Exception:
-            print("{} - Runs a given AoC day (or the current day if no arguments are given)".format(sys.argv[0]))
-            print("Usage: {} [day]".format(sys.argv[0]))
+            parser.print_usage()
             sys.exit(1)
     else:
         day_number = datetime.date.today().day
@@ -25,14 +74,15 @@ if __name__ == "__main__":
         print("Day given is out of range 1-25.")
         sys.exit(2)
 
-    if os.path.isfile("settings.json"):
-        with open("settings.json", 'r') as s:
-            settings = json.loads("".join(s.readlines()))
-    else:
-        shutil.copy("settings.json.default", "settings.json")
-        print("Please fill in settings.json first!")
-        sys.exit(3)
+    if args.jobs < 1:
+        print("Number of jobs must be at least 1.")
+        sys.exit(2)
 
+    if args.budget is not None and args.budget <= 0:
+        print("Budget must be more than 0 seconds.")
+        sys.exit(2)
+
+    settings = load_settings()
     session_token = settings['session_token']
     year = settings['year']
 
@@ -40,39 +90,18 @@ if __name__ == "__main__":
     if run_everything:
         days_to_run = [x+1 for x in range(25)]
 
-    # Dynamically try to load the requested day
-    from days import *
-    from aocdays import AOCDays
-    days: AOCDays = AOCDays.get_instance()
-
-    for d in days_to_run:
-        day = days.get_day(d)
+    options = {
+        'parse_cache': args.parse_cache,
+        'verbosity': args.verbosity,
+        'budget': args.budget,
+        'answer_cache': True,
+        'force': args.force,
+    }
 
-        if day:
-            for someones_day in day:
-                print("Attempting to run AoC day {} from {}...".format(d, someones_day.creator))
-                # noinspection PyBroadException
-                try:
-                    instance = someones_day(year, d, session_token)
-                    instance.run()
-                except ConnectionError as e:
-                    print(e, file=sys.stderr)
-                except Exception as e:
-                    traceback.print_exc()
-        else:
-            if d == datetime.date.today().day or (len(sys.argv) >= 3 and sys.argv[2] == "create"):
-                # This is today, create it!
-                template_filename = os.path.join(os.path.dirname(__file__), "days/_template.py")
-                newday_filename = os.path.join(os.path.dirname(__file__), "days/day{}.py".format(d))
-                shutil.copy(template_filename, newday_filename)
-                with open(newday_filename, 'r') as f:
-                    lines = f.readlines()
-                lines = [x.replace("@day(0)", "@day({})".format(d)) for x in lines]
-                with open(newday_filename, 'w') as f:
-                    f.writelines(lines)
-
-                print("Files for day {} created! Happy coding and good luck!".format(d))
-            else:
-                print("Attempting to run AoC day {}...".format(d))
-                print("I have nothing to run for day {}".format(d))
+    from aocrunner import run_day, run_days_parallel
 
+    if args.jobs > 1 and len(days_to_run) > 1:
+        run_days_parallel(days_to_run, year, session_token, args.jobs, options)
+    else:
+        for d in days_to_run:
+            run_day(d, year, session_token, create=args.create is not None, options=options)